@@ -1,10 +1,11 @@
-import numpy as np
 import matplotlib.pyplot as plt
 
+import bank
+
 # Parameter
 Ts = 0.002  # Abtastintervall = 2 ms
 Nt = 500    # Anzahl der Abtastpunkte
-t = np.arange(0, Nt) * Ts  # Zeitachse von 0 bis 1 Sekunde
+t = bank.timeAxis(Nt, Ts)  # Zeitachse von 0 bis 1 Sekunde
 
 # Frequenzen für die Analyse
 frequenzen = [1, 5, 5.3, 100, 200, 300]
@@ -13,10 +14,12 @@ frequenzen = [1, 5, 5.3, 100, 200, 300]
 fig, axes = plt.subplots(len(frequenzen), 1, figsize=(10, 12))
 fig.suptitle("Kosinusschwingungen bei verschiedenen Frequenzen", fontsize=16)
 
+# Alle Signale auf einmal: eine Spalte pro Frequenz
+y = bank.tones(frequenzen, Nt, Ts)
+
 # Schleife zur Darstellung der Signale
 for i, f in enumerate(frequenzen):
-    y = np.cos(2 * np.pi * f * t)
-    axes[i].plot(t, y)
+    axes[i].plot(t, y[:, i])
     axes[i].set_title(f"f = {f} Hz")
     axes[i].grid(True)
 
@@ -2,9 +2,11 @@ import sys
 import os
 import json
 import importlib
+import threading
 import traceback
+from collections import deque
 
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtCore import Qt, QRect, QObject, QTimer, pyqtSignal
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 
@@ -12,7 +14,21 @@ from matplotlib.backends.qt_compat import QtWidgets
 from matplotlib.backends.backend_qtagg import FigureCanvas, NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 import matplotlib
-matplotlib.rcParams.update({'font.size': 24})
+import audio_cache
+import discovery
+import features
+import playback
+import raster
+import redraw
+import result_cache
+import sample_store
+import spectral
+import timing
+
+
+ANALYSIS_RATES = (0, 8000, 11025, 16000, 22050, 32000, 44100)  # 0 = Originalrate
+CHANNELS = (("Links", 0), ("Rechts", 1), ("Mitte (L+R)/2", "mid"), ("Seite (L-R)/2", "side"),
+            ("Alle Kanäle", "all"))
 
 
 class ErrorMsg(QMessageBox):
@@ -32,20 +48,279 @@ class ErrorMsg(QMessageBox):
                   int(self.master.geometry().bottom() - self.frameGeometry().height()))
 
 
+class TimedCanvas(FigureCanvas):
+    # Vollständiges Neuzeichnen der Figure als eigener Schritt in der Zeitmessung
+    def draw(self):
+        with timing.stage("draw"):
+            super().draw()
+
+
+class FrameView(QWidget):
+    # Zeigt die Bilder aus dem Raster-Prozess; ein Klick wechselt zur Zeichenfläche
+    clicked = pyqtSignal()
+    resized = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.pixels = None
+        self.image = None
+
+    def setFrame(self, rgba):
+        height, width, _ = rgba.shape
+        self.pixels = rgba  # QImage verweist nur auf die Daten
+        self.image = QImage(rgba.data, width, height, 4 * width, QImage.Format_RGBA8888)
+        self.image.setDevicePixelRatio(self.devicePixelRatioF())
+        self.update()
+
+    def paintEvent(self, event):
+        if self.image is not None:
+            QPainter(self).drawImage(0, 0, self.image)
+
+    def mousePressEvent(self, event):
+        self.clicked.emit()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit()
+
+
+class FeatureItem(QTableWidgetItem):
+    # Tabellenzelle, die nach dem Zahlenwert sortiert (fehlende Werte zuletzt)
+    def __init__(self, value, fmt):
+        super().__init__("" if value is None else fmt.format(value))
+        self.value = float("inf") if value is None else value
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        return self.value < getattr(other, "value", float("inf"))
+
+
+class FilePicker(QDialog):
+    # Sound-Dateien mit den Merkmalen aus dem Index (features.py), ohne zu
+    # dekodieren. Klick auf eine Spaltenüberschrift sortiert, das Filterfeld
+    # nimmt Bedingungen wie "peak>1k duration<10" und Teile des Dateinamens.
+    def __init__(self, parent, fileNames, index, current, text=""):
+        super().__init__(parent)
+        self.setWindowTitle("Sound-Dateien")
+        self.fileNames = fileNames
+        self.index = index
+        self.entries = {}
+        self.selected = None
+
+        self.filter = QLineEdit(text, self)
+        self.filter.setPlaceholderText("Filter, z. B. peak>1k duration<10 mosquito  (Schlüssel: " +
+                                       ", ".join(key for key, _, _ in features.FIELDS) + ")")
+        self.filter.textChanged.connect(self.apply)
+
+        self.table = QTableWidget(0, 1 + len(features.FIELDS), self)
+        self.table.setHorizontalHeaderLabels(["Datei"] + [title for _, title, _ in features.FIELDS])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.cellDoubleClicked.connect(self.accept)
+
+        self.status = QLabel(self)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.filter)
+        layout.addWidget(self.table)
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.addWidget(self.status, 1)
+        bottom.addWidget(buttons)
+        layout.addLayout(bottom)
+        self.resize(int(parent.width() * 0.9), int(parent.height() * 0.7))
+
+        self.fill(current)
+        self.table.setSortingEnabled(True)
+
+    def currentFile(self):
+        row = self.table.currentRow()
+        if row < 0 or self.table.isRowHidden(row):
+            return None
+        return self.table.item(row, 0).text()
+
+    def fill(self, current=None):
+        # Tabelle neu aufbauen, z. B. wenn der Index im Hintergrund weiterkommt
+        current = current or self.currentFile()
+        sorting = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(self.fileNames))
+        self.entries = {fileName: self.index.get(fileName) for fileName in self.fileNames}
+        for row, fileName in enumerate(self.fileNames):
+            entry = self.entries[fileName]
+            self.table.setItem(row, 0, QTableWidgetItem(fileName))
+            for column, (key, _, fmt) in enumerate(features.FIELDS, 1):
+                self.table.setItem(row, column, FeatureItem(None if entry is None else entry.get(key), fmt))
+        self.table.setSortingEnabled(sorting)
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).text() == current:
+                self.table.setCurrentCell(row, 0)
+        self.apply(self.filter.text())
+
+    def apply(self, text):
+        shown = 0
+        for row in range(self.table.rowCount()):
+            fileName = self.table.item(row, 0).text()
+            hidden = not features.matches(fileName, self.entries.get(fileName), text)
+            self.table.setRowHidden(row, hidden)
+            shown += not hidden
+        missing = sum(entry is None for entry in self.entries.values())
+        self.status.setText("{0} von {1} Dateien".format(shown, len(self.fileNames)) +
+                            ("  (Merkmale für {0} Dateien fehlen noch)".format(missing) if missing else ""))
+
+    def accept(self):
+        self.selected = self.currentFile()
+        super().accept()
+
+
+class Job:
+    # Ein Skriptaufruf im Hintergrund. Zeichenbefehle und Audio werden nur
+    # gesammelt und im GUI-Thread ausgeführt: Zeichnen bei jedem draw() des
+    # Skripts, der Rest und das Audio nach Abschluss. Spekulative Jobs rechnen
+    # Nachbarstellungen der Slider nur für den Ergebnis-Cache vor.
+    def __init__(self, run, plotter, value, value2, fig, fileName, key=None, speculative=False):
+        self.run = run
+        self.plotter = plotter
+        self.args = (value, value2, fig, fileName)
+        self.key = key
+        self.speculative = speculative
+        self.generation = 0
+        self.worker = None
+        self.ops = []
+        self.sent = 0
+        self.audio = None
+        self.error = None
+
+    def stale(self):
+        return self.generation != self.worker.generation
+
+    def play(self, data, fs):
+        self.audio = (data, fs)
+
+    def publish(self, ops):
+        self.sent += len(ops)
+        self.worker.progress.emit((self, ops))
+
+    def execute(self):
+        publish = None if self.speculative else self.publish
+        with self.plotter.recording(self.stale, publish) as self.ops, timing.stage("script"):
+            self.run(*self.args, self)
+
+
+class ScriptWorker(QObject):
+    # Rechnet immer nur den neuesten Job; ältere werden verworfen oder abgebrochen.
+    # Ist nichts anderes zu tun, folgen die spekulativen Jobs; jeder neue Job
+    # macht sie veraltet.
+    finished = pyqtSignal(object)
+    progress = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.cond = threading.Condition()
+        self.pending = None
+        self.speculative = deque()
+        self.generation = 0
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, job):
+        with self.cond:
+            self.generation += 1
+            job.generation = self.generation
+            job.worker = self
+            self.pending = job
+            self.speculative.clear()
+            self.cond.notify()
+
+    def speculate(self, jobs):
+        with self.cond:
+            for job in jobs:
+                job.generation = self.generation
+                job.worker = self
+            self.speculative.extend(jobs)
+            self.cond.notify()
+
+    def cancel(self):
+        with self.cond:
+            self.generation += 1
+            self.pending = None
+            self.speculative.clear()
+
+    def loop(self):
+        while True:
+            with self.cond:
+                while self.pending is None and not self.speculative:
+                    self.cond.wait()
+                if self.pending is not None:
+                    job, self.pending = self.pending, None
+                else:
+                    job = self.speculative.popleft()
+            try:
+                job.execute()
+            except redraw.Cancelled:
+                continue
+            except Exception as err:
+                job.error = err
+            # Auch veraltete, aber fertige Ergebnisse landen noch im Cache
+            self.finished.emit(job)
+
+
 class ApplicationWindow(QtWidgets.QMainWindow):
+    # Merkmalsindex im Hintergrund weitergekommen (Liste der fertigen Dateien)
+    indexed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SignalProcessingGUI v1.2")
         self._main = QtWidgets.QWidget()
         self.setCentralWidget(self._main)
 
-        static_canvas = FigureCanvas(Figure())
-        static_canvas.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
-
         try:
             self.config = json.load(open('SignalProcessingGUI.json'))
         except:
             self.config = {'fileIndex': 0, 'val1': 0, 'val2': 0, 'WinRect': [100, 100, 600, 400], 'scriptIndex': 0}
+        matplotlib.rcParams.update({'font.size': self.config.get('fontSize', 24)})
+        # Schlanker Modus: float32 vom Dekodieren bis zur Wiedergabe (opt-in)
+        spectral.FLOAT32 = self.config.get("float32", False)
+
+        static_canvas = TimedCanvas(Figure())
+        static_canvas.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
+        toolbar = NavigationToolbar(static_canvas, self)
+
+        # Optional (renderProcess): Layout und Rastern im eigenen Prozess, hier
+        # wird nur das fertige Bild gezeigt. Zoom/Pan über die Toolbar oder ein
+        # Klick ins Bild wechselt zur Zeichenfläche mit dem letzten Stand.
+        self.stack = QStackedWidget(self)
+        self.stack.addWidget(static_canvas)
+        self.raster = None
+        self.live = True
+        self.unplotted = []
+        self.frameNumber = 0
+        if self.config.get("renderProcess", False):
+            self.raster = raster.RasterService({"font.size": matplotlib.rcParams["font.size"]})
+            self.frameView = FrameView()
+            self.frameView.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
+            self.frameView.clicked.connect(self.showCanvas)
+            self.frameView.resized.connect(self.rasterResized)
+            self.stack.addWidget(self.frameView)
+            self.stack.setCurrentWidget(self.frameView)
+            self.live = False
+            toolbar.actionTriggered.connect(self.showCanvas)
+            self.frameTimer = QTimer(self)
+            self.frameTimer.setInterval(15)
+            self.frameTimer.timeout.connect(self.showFrame)
+            self.frameTimer.start()
+
+        # Ein Wiedergabe-Prozess für die ganze Sitzung ("null" = ohne Audiohardware).
+        # Die Prozesse (Raster, Wiedergabe) entstehen per fork, daher vor allen
+        # Threads (Import, Sample-Store, Merkmalsindex); der Dienst startet seinen
+        # eigenen Zuführ-Thread erst nach dem fork.
+        self.process = playback.PlaybackService(self.config.get("audioBackend", "pyaudio"))
 
         self.setGeometry(*self.config['WinRect'])
         ag = QDesktopWidget().availableGeometry(self)
@@ -57,34 +332,38 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         reload_button.setFixedHeight(50)
         reload_button.setFixedWidth(200)
 
+        trace_button = QPushButton('Trace')
+        trace_button.clicked.connect(self.exportTrace)
+        trace_button.setFixedHeight(50)
+        trace_button.setFixedWidth(120)
+
         self.old_value = -1
         self.old_value2 = -1
         self.old_fileName = ""
         self.script = ""
 
+        # Skripte nur statisch suchen (AST + Manifest), importiert wird erst bei Auswahl
         self.comboScripts = QComboBox(self)
-        for file in os.listdir("."):
-            if file.endswith(".py"):
-                f = open(file, "r").read()
-                if "def run(" in f:
-                    try:
-                        module = importlib.import_module(file.rsplit('.', 1)[0])
-                        if hasattr(module, "run"):
-                            self.comboScripts.addItem(file)
-                    except Exception as err:
-                        print("Script " + file + " not loaded: " + str(err))
+        for file in discovery.scan("."):
+            self.comboScripts.addItem(file)
 
         if self.config["scriptIndex"] < 0 or self.config["scriptIndex"] >= self.comboScripts.count():
             self.config["scriptIndex"] = 0
         self.comboScripts.setCurrentIndex(self.config["scriptIndex"])
-        self.comboScripts.currentTextChanged.connect(self.reload)
+        self.comboScripts.currentTextChanged.connect(self.select)
+
+        # Zuletzt gewähltes Skript schon importieren, während das Fenster aufgebaut wird
+        self.mtimes = {}
+        self.importLock = threading.Lock()
+        # Fertige Ergebnisse je (Skript, Datei, mtime, value, value2)
+        self.results = result_cache.ResultCache(self.config.get("resultCacheMB", 256) * 2**20)
+        threading.Thread(target=self.importScript, args=(self.comboScripts.currentText(),), daemon=True).start()
 
         self.sld = QSlider(Qt.Orientation.Horizontal, self)
         self.sld.setRange(0, 100)
         self.sld.setPageStep(1)
         self.sld.setValue(self.config["val1"])
         self.sld.valueChanged.connect(self.changed)
-        self.sld.sliderReleased.connect(self.update)
 
         self.label = QLabel(str(self.config["val1"]), self)
         self.label.setAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
@@ -99,7 +378,6 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         self.sld2.setPageStep(1)
         self.sld2.setValue(self.config["val2"])
         self.sld2.valueChanged.connect(self.changed2)
-        self.sld2.sliderReleased.connect(self.update)
 
         self.label2 = QLabel(str(self.config["val2"]), self)
         self.label2.setAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
@@ -115,48 +393,129 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         if not os.path.exists(sound_dir):
             os.makedirs(sound_dir)
 
-        sound_files = set()
-
-        for file in os.listdir(sound_dir):
-            if file.endswith((".ogg", ".wav", ".mp3")):
-                sound_files.add(os.path.join(sound_dir, file))
-
-        for file in os.listdir("."):
-            if file.endswith((".ogg", ".wav", ".mp3")):
-                sound_files.add(file)
-
-        for file in sorted(sound_files):
+        sound_files = features.soundFiles((sound_dir, "."))
+        for file in sound_files:
             self.combo.addItem(file)
 
         if self.config["fileIndex"] < 0 or self.config["fileIndex"] >= self.combo.count():
             self.config["fileIndex"] = 0
         self.combo.setCurrentIndex(self.config["fileIndex"])
+
+        # Alle Dateien im Hintergrund einmalig nach float32 umwandeln (ab dem
+        # nächsten Öffnen per memmap), die gewählte Datei zuerst
+        current = self.combo.currentText()
+        sample_store.prefetch(sorted(sound_files, key=lambda file: file != current))
         self.combo.currentTextChanged.connect(self.update)
 
+        # Merkmale (Dauer, Spitzenfrequenz, Schwerpunkt, ...) für die Dateiauswahl
+        # im Hintergrund aktualisieren; nur neue oder geänderte Dateien werden gerechnet.
+        # Erst hier, nachdem Raster- und Wiedergabe-Prozess gestartet sind.
+        self.features = features.FeatureIndex()
+        self.picker = None
+        self.indexed.connect(self.featuresIndexed)
+        self.features.schedule(sound_files, progress=lambda file: self.indexed.emit([file]), done=self.indexed.emit)
+        pick_button = QPushButton('Suchen...')
+        pick_button.clicked.connect(self.pickFile)
+
+        # Analyse-Rate: Dateien mit höherer Rate werden vor den Skripten heruntergerechnet
+        self.comboRate = QComboBox(self)
+        for rate in ANALYSIS_RATES:
+            self.comboRate.addItem("{0} Hz".format(rate) if rate else "Originalrate", rate)
+        index = self.comboRate.findData(self.config.get("analysisRate", 0))
+        self.comboRate.setCurrentIndex(max(index, 0))
+        audio_cache.RATE = self.comboRate.currentData() or None
+        self.comboRate.currentIndexChanged.connect(self.rateChanged)
+
+        # Kanalauswahl bzw. Downmix für alle Skripte
+        self.comboChannel = QComboBox(self)
+        for name, channel in CHANNELS:
+            self.comboChannel.addItem(name, channel)
+        index = self.comboChannel.findData(self.config.get("channel", 0))
+        self.comboChannel.setCurrentIndex(max(index, 0))
+        audio_cache.CHANNEL = self.comboChannel.currentData()
+        self.comboChannel.currentIndexChanged.connect(self.channelChanged)
+
         layout = QtWidgets.QVBoxLayout(self._main)
         layout4 = QtWidgets.QHBoxLayout()
         layout4.addWidget(self.comboScripts)
         layout4.addWidget(reload_button)
+        layout4.addWidget(trace_button)
 
         layout.addLayout(layout4)
-        layout.addWidget(self.combo)
+        layout5 = QtWidgets.QHBoxLayout()
+        layout5.addWidget(self.combo, 1)
+        layout5.addWidget(pick_button)
+        layout5.addWidget(self.comboChannel)
+        layout5.addWidget(self.comboRate)
+        layout.addLayout(layout5)
         layout.addLayout(layout2)
         layout.addLayout(layout3)
-        layout.addWidget(NavigationToolbar(static_canvas, self))
-        layout.addWidget(static_canvas)
+        layout.addWidget(toolbar)
+        layout.addWidget(self.stack)
 
-        self.process = None
+        self.cache = audio_cache.CACHE
         self.fig = static_canvas.figure
-        self.reload()
+        # Skripte mit redraw-Plotter aktualisieren nur die Linien und blitten
+        self.plotter = redraw.get(self.fig)
+        self.plotter.blit = True
+
+        # Slider-Ereignisse sammeln und nur den letzten Stand im Hintergrund rechnen
+        self.background = False
+        self.worker = ScriptWorker()
+        self.worker.finished.connect(self.finished)
+        self.worker.progress.connect(self.progress)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(30)
+        self.timer.timeout.connect(self.update)
+
+        # Dauer der einzelnen Schritte des letzten Updates in der Statusleiste,
+        # gleitende Perzentile als Tooltip
+        self.status = QLabel(self)
+        self.statusBar().addWidget(self.status, 1)
+        self.statusTimer = QTimer(self)
+        self.statusTimer.setInterval(250)
+        self.statusTimer.timeout.connect(self.showTiming)
+        self.statusTimer.start()
+
+        # Im Leerlauf werden die Nachbarstellungen der Slider vorab gerechnet
+        self.idleTimer = QTimer(self)
+        self.idleTimer.setSingleShot(True)
+        self.idleTimer.setInterval(300)
+        self.idleTimer.timeout.connect(self.speculate)
+        self.select()
         self.update()
 
+    def importScript(self, script, force=False):
+        # Import nur beim ersten Mal, danach reload bei Änderung der Datei oder per Button
+        if not script:
+            return None
+        name = script.rsplit('.', 1)[0]
+        with self.importLock:
+            mtime = os.stat(script).st_mtime_ns
+            module = sys.modules.get(name)
+            if module is None:
+                module = importlib.import_module(name)
+            elif force or self.mtimes.get(name) != mtime:
+                module = importlib.reload(module)
+                self.results.clear()
+            self.mtimes[name] = mtime
+            return module
+
+    def select(self):
+        self.load(False)
+
     def reload(self):
+        self.load(True)
+
+    def load(self, force):
         script = str(self.comboScripts.currentText())
         self.script = ""
         try:
-            module = __import__(script.rsplit('.', 1)[0])
-            importlib.reload(module)
+            module = self.importScript(script, force)
             self.run = getattr(module, "run")
+            # Nur Skripte, die ausschließlich über redraw zeichnen, laufen im Hintergrund
+            self.background = getattr(module, "BACKGROUND", False)
             self.update()
         except Exception as err:
             print("Script " + script + " not loaded: " + str(err))
@@ -164,14 +523,22 @@ class ApplicationWindow(QtWidgets.QMainWindow):
     def changed(self, value):
         if str(value) != self.label.text():
             self.label.setText(str(value))
-            if not self.sld.isSliderDown():
-                self.update()
+            self.timer.start()
 
     def changed2(self, value):
         if str(value) != self.label2.text():
             self.label2.setText(str(value))
-            if not self.sld2.isSliderDown():
-                self.update()
+            self.timer.start()
+
+    def rateChanged(self):
+        audio_cache.RATE = self.comboRate.currentData() or None
+        self.old_fileName = ""
+        self.update()
+
+    def channelChanged(self):
+        audio_cache.CHANNEL = self.comboChannel.currentData()
+        self.old_fileName = ""
+        self.update()
 
     def update(self):
         script = str(self.comboScripts.currentText())
@@ -182,31 +549,209 @@ class ApplicationWindow(QtWidgets.QMainWindow):
 
         if script and (self.script != script or self.old_value != value or
                        self.old_value2 != value2 or self.old_fileName != fileName):
+            timing.begin()
+            switched = self.script != script or self.old_fileName != fileName
             self.script = script
             self.old_fileName = fileName
             self.old_value = value
             self.old_value2 = value2
+            if self.background:
+                if switched:
+                    self.showRaster()
+                key = self.resultKey(value, value2)
+                result = self.results.get(key)
+                if result is not None:
+                    self.worker.cancel()
+                    self.showResult(result)
+                    self.idleTimer.start()
+                    return
+                self.worker.submit(Job(self.run, self.plotter, value, value2, self.fig, fileName, key))
+                return
+            self.worker.cancel()
+            self.unplotted = []
+            self.showCanvas()
             try:
-                self.run(value, value2, self.fig, fileName, self.process)
+                with timing.stage("script"):
+                    self.run(value, value2, self.fig, fileName, self.process)
             except Exception as err:
                 self.errorMsg(err)
 
+    def progress(self, item):
+        job, ops = item
+        if job.stale():
+            return
+        try:
+            with timing.stage("replay"):
+                self.display(ops)
+        except Exception as err:
+            self.errorMsg(err)
+
+    def finished(self, job):
+        if job.error is None and job.key is not None:
+            self.results.put(job.key, job.ops, job.audio)
+        if job.speculative or job.stale():
+            return
+        if job.error is not None:
+            self.errorMsg(job.error)
+            return
+        try:
+            with timing.stage("replay"):
+                self.display(job.ops[job.sent:])
+        except Exception as err:
+            self.errorMsg(err)
+            return
+        if job.audio is not None:
+            self.process.play(*job.audio)
+        self.idleTimer.start()
+
+    def showResult(self, result):
+        try:
+            with timing.stage("replay"):
+                self.display(result.ops)
+        except Exception as err:
+            self.errorMsg(err)
+            return
+        if result.audio is not None:
+            self.process.play(*result.audio)
+
+    def display(self, ops):
+        # Aufgezeichnete Befehle auf der Zeichenfläche ausführen oder rastern lassen;
+        # die Befehle seit dem letzten layout bleiben für den Wechsel zur Zeichenfläche
+        if self.live:
+            self.plotter.replay(ops)
+            return
+        if any(op[0] == "layout" for op in ops):
+            self.unplotted = []
+        self.unplotted.extend(ops)
+        self.raster.submit(ops, *self.frameSize())
+
+    def frameSize(self):
+        ratio = self.frameView.devicePixelRatioF()
+        return self.frameView.width() * ratio, self.frameView.height() * ratio, self.fig.dpi
+
+    def showFrame(self):
+        frame = self.raster.take(self.frameNumber)
+        if frame is None:
+            return
+        self.frameNumber, rgba, start, end = frame
+        timing.TIMER.add("raster", start, end)
+        self.frameView.setFrame(rgba)
+
+    def rasterResized(self):
+        if not self.live:
+            self.raster.submit([], *self.frameSize())
+
+    def showCanvas(self, *args):
+        # Zeichenfläche mit dem zuletzt gerasterten Stand übernehmen
+        if self.live:
+            return
+        self.live = True
+        self.stack.setCurrentIndex(0)
+        ops, self.unplotted = self.unplotted, []
+        if ops:
+            try:
+                self.plotter.replay(result_cache.compact(ops))
+            except Exception as err:
+                self.errorMsg(err)
+
+    def showRaster(self):
+        # Nach Skript- oder Dateiwechsel wieder gerasterte Bilder zeigen
+        if self.raster is None or not self.live:
+            return
+        self.live = False
+        self.stack.setCurrentWidget(self.frameView)
+
+    def resultKey(self, value, value2):
+        fileName = self.combo.currentText()
+        try:
+            mtime = os.stat(fileName).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (self.script, self.mtimes.get(self.script.rsplit('.', 1)[0]), fileName, mtime,
+                audio_cache.CHANNEL, audio_cache.RATE, value, value2)
+
+    def speculate(self):
+        # Nachbarn der aktuellen Sliderstellung, die noch nicht im Cache liegen
+        if not self.background or not self.script:
+            return
+        value = self.sld.value()
+        value2 = self.sld2.value()
+        fileName = self.combo.currentText()
+        jobs = []
+        for v, v2 in ((value - 1, value2), (value + 1, value2), (value, value2 - 1), (value, value2 + 1)):
+            if not (self.sld.minimum() <= v <= self.sld.maximum() and
+                    self.sld2.minimum() <= v2 <= self.sld2.maximum()):
+                continue
+            key = self.resultKey(v, v2)
+            if key not in self.results:
+                jobs.append(Job(self.run, self.plotter, v, v2, self.fig, fileName, key, speculative=True))
+        if jobs:
+            self.worker.speculate(jobs)
+
+    def resultStats(self):
+        return self.results.stats()
+
+    def showTiming(self):
+        text = timing.summary()
+        if text != self.status.text():
+            self.status.setText(text)
+            self.status.setToolTip(timing.report())
+
+    def exportTrace(self):
+        fileName = self.config.get("traceFile", "SignalProcessingGUI.trace.json")
+        count = timing.export(fileName)
+        self.statusBar().showMessage("{0} Ereignisse nach {1} geschrieben".format(count, fileName), 5000)
+
+    def cacheStats(self):
+        return self.cache.stats()
+
+    @property
+    def cacheHits(self):
+        return self.cache.hits
+
+    @property
+    def cacheMisses(self):
+        return self.cache.misses
+
+    @property
+    def cacheEvictions(self):
+        return self.cache.evictions
+
     def errorMsg(self, err):
         if hasattr(self, "msg"):
             self.msg.close()
-        self.msg = ErrorMsg(self, traceback.format_exc())
+        self.msg = ErrorMsg(self, "".join(traceback.format_exception(type(err), err, err.__traceback__)))
         traceback.print_exception(type(err), err, err.__traceback__)
 
+    def pickFile(self):
+        files = [self.combo.itemText(i) for i in range(self.combo.count())]
+        self.picker = FilePicker(self, files, self.features, self.combo.currentText(),
+                                 self.config.get("fileFilter", ""))
+        if self.picker.exec() == QDialog.Accepted and self.picker.selected:
+            self.combo.setCurrentIndex(self.combo.findText(self.picker.selected))
+        self.config["fileFilter"] = self.picker.filter.text()
+        self.picker = None
+
+    def featuresIndexed(self, files):
+        if self.picker is not None and files:
+            self.picker.fill()
+
     def save(self):
         self.config["val1"] = self.sld.value()
         self.config["val2"] = self.sld2.value()
         self.config["fileIndex"] = self.combo.currentIndex()
         self.config["scriptIndex"] = self.comboScripts.currentIndex()
+        self.config["analysisRate"] = self.comboRate.currentData()
+        self.config["channel"] = self.comboChannel.currentData()
         self.config['WinRect'] = [*self.geometry().getRect()]
         json.dump(self.config, open('SignalProcessingGUI.json', 'w'), default=lambda x: x.__dict__)
 
     def closeEvent(self, event):
         self.save()
+        self.process.close()
+        self.features.close()
+        if self.raster is not None:
+            self.raster.close()
         if hasattr(self, "msg"):
             self.msg.close()
 
@@ -1,6 +1,16 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
 
+import spectral
+
+# Schätzverfahren für die Monte-Carlo-Studie (siehe study())
+ESTIMATORS = ("plain", "padded", "tiled", "jacobsen", "zoom")
+CHUNK = 256  # Zeilen pro FFT-Aufruf, begrenzt den Speicher bei 10-facher Länge
+ZOOM_BINS = 5       # Halbe Bandbreite des Zoom-Spektrums in FFT-Bins
+ZOOM_POINTS = 512   # Auswertungspunkte im Zoom-Band
+
 def run(value, value2, fig, fileName, saveValue=None):
     # Parameter
     Ns = 500              # Abtastpunkte
@@ -24,21 +34,21 @@ def run(value, value2, fig, fileName, saveValue=None):
     # Überlagertes Signal
     signal_noisy = a1 + noise
 
-    # --- Analyse 1: normale FFT
-    spectrum = np.abs(np.fft.fft(signal_noisy))
-    freqs = np.fft.fftfreq(len(signal_noisy), Ts)
-    max_freq_index = np.argmax(spectrum[:len(spectrum)//2])
-    estimated_freq = freqs[max_freq_index]
+    # --- Analyse 1: normale FFT (reelles Signal -> rfft, nur positive Frequenzen)
+    spectrum = np.abs(spectral.rfft(signal_noisy))
+    freqs = np.fft.rfftfreq(Ns, Ts)
 
-    # --- Analyse 2: Nullpadding
-    signal_padded = np.hstack((signal_noisy, np.zeros(9 * Ns)))  # 10x mehr Punkte
-    spectrum_padded = np.abs(np.fft.fft(signal_padded))
-    freqs_padded = np.fft.fftfreq(len(signal_padded), Ts)
+    # --- Analyse 2: Feinschätzung ohne 10-fache FFT: Jacobsen auf den Bins,
+    # dann Chirp-z nur im Band um den Peak und Parabel-Interpolation
+    estimated_freq = float(spectral.peak(signal_noisy, fs))
 
-    # --- Analyse 3: Signalverlängerung durch Wiederholung
-    signal_extended = np.tile(signal_noisy, 10)
-    spectrum_extended = np.abs(np.fft.fft(signal_extended))
-    freqs_extended = np.fft.fftfreq(len(signal_extended), Ts)
+    # --- Feines Spektrum nur im Band ±ZOOM_BINS Bins um den Schätzwert
+    width = fs / Ns
+    start = max(0.0, estimated_freq - ZOOM_BINS * width)
+    step = 2 * ZOOM_BINS * width / (ZOOM_POINTS - 1)
+    freqs_zoom = start + step * np.arange(ZOOM_POINTS)
+    spectrum_zoom = np.abs(spectral.zoom(signal_noisy, fs, start, step, ZOOM_POINTS))
+    band = (freqs >= freqs_zoom[0]) & (freqs <= freqs_zoom[-1])
 
     # --- Plot
     fig.clf()
@@ -49,15 +59,85 @@ def run(value, value2, fig, fileName, saveValue=None):
     ax1.set_title("Noisy Sinus")
 
     ax2 = fig.add_subplot(3, 1, 2)
-    ax2.plot(freqs[:len(freqs)//2], spectrum[:len(spectrum)//2])
+    ax2.plot(freqs[:Ns//2], spectrum[:Ns//2])
     ax2.set_title("Spektrum (original)")
 
     ax3 = fig.add_subplot(3, 1, 3)
-    ax3.plot(freqs_padded[:len(freqs_padded)//2], spectrum_padded[:len(freqs_padded)//2], label="Zero-padding")
-    ax3.plot(freqs_extended[:len(freqs_extended)//2], spectrum_extended[:len(freqs_extended)//2], linestyle='dashed', label="Signal verlängert")
-    ax3.set_title("Spektren mit höherer Auflösung")
+    ax3.plot(freqs_zoom, spectrum_zoom, label="Zoom (Chirp-z)")
+    ax3.plot(freqs[band], spectrum[band], 'o', label="FFT-Bins")
+    ax3.axvline(estimated_freq, color='k', linestyle='dashed', label="Schätzung")
+    ax3.set_title("Spektrum mit höherer Auflösung im Band um den Peak")
     ax3.legend()
 
     fig.tight_layout()
     fig.canvas.draw()
 
+
+def estimate(signals, Ts, method="plain"):
+    # FFT-Argmax-Schätzer für viele Signale auf einmal: signals hat die Form (..., Ns)
+    Ns = signals.shape[-1]
+    n = Ns if method == "plain" else 10 * Ns
+    rows = signals.reshape(-1, Ns)
+    freqs = np.fft.rfftfreq(n, Ts)
+    est = np.empty(rows.shape[0])
+    for i in range(0, rows.shape[0], CHUNK):
+        block = rows[i:i + CHUNK]
+        if method == "zoom":
+            est[i:i + CHUNK] = spectral.peak(block.T, 1 / Ts)
+            continue
+        if method == "jacobsen":
+            X = np.fft.rfft(block.T, axis=0)[:Ns // 2]
+            est[i:i + CHUNK] = spectral.jacobsen(X, np.argmax(np.abs(X), axis=0)) / (Ns * Ts)
+            continue
+        if method == "tiled":
+            block = np.tile(block, (1, 10))
+        spectrum = np.abs(np.fft.rfft(block, n=n, axis=-1))
+        # wie in run(): nur die erste Hälfte (ohne Nyquist-Bin) durchsuchen
+        est[i:i + CHUNK] = freqs[np.argmax(spectrum[:, :n // 2], axis=-1)]
+    return est.reshape(signals.shape[:-1])
+
+
+def studyRow(freq, noises, trials, seed, Ns, Ts):
+    # Alle Rauschstärken und Versuche für eine Frequenz als ein Array (S, trials, Ns)
+    rng = np.random.default_rng(seed)
+    t = np.arange(Ns) * Ts
+    noises = np.asarray(noises, dtype=float)
+    signals = (rng.random((noises.size, trials, Ns)) - 0.5) * (2 * noises[:, None, None])
+    signals += np.sin(2 * np.pi * freq * t)
+    bias = np.empty((len(ESTIMATORS), noises.size))
+    var = np.empty((len(ESTIMATORS), noises.size))
+    for k, method in enumerate(ESTIMATORS):
+        est = estimate(signals, Ts, method)
+        bias[k] = est.mean(axis=1) - freq
+        var[k] = est.var(axis=1)
+    return bias, var
+
+
+def study(freqs, noises, trials=1000, seed=0, workers=None, Ns=500, Ts=0.002):
+    # Monte-Carlo-Studie über Frequenzen x Rauschstärken x Versuche.
+    # Jede Frequenz bekommt einen eigenen Zufallsstrom und läuft in einem eigenen Prozess.
+    seeds = np.random.SeedSequence(seed).spawn(len(freqs))
+    n = len(freqs)
+    with ProcessPoolExecutor(workers) as pool:
+        rows = list(pool.map(studyRow, freqs, [noises] * n, [trials] * n, seeds, [Ns] * n, [Ts] * n))
+    # Ergebnisform: (Verfahren, Frequenz, Rauschstärke)
+    return {"freqs": np.asarray(freqs), "noises": np.asarray(noises),
+            "bias": np.stack([r[0] for r in rows], axis=1),
+            "var": np.stack([r[1] for r in rows], axis=1)}
+
+
+if __name__ == '__main__':
+    result = study(freqs=np.linspace(1, 67, 12), noises=np.linspace(0, 10, 6), trials=2000)
+    fig = plt.figure(figsize=(12, 8))
+    for k, method in enumerate(ESTIMATORS):
+        ax = fig.add_subplot(2, len(ESTIMATORS), k + 1)
+        ax.plot(result["noises"], np.abs(result["bias"][k]).mean(axis=0))
+        ax.set_title(f"{method}: |Bias| [Hz]")
+        ax = fig.add_subplot(2, len(ESTIMATORS), len(ESTIMATORS) + k + 1)
+        ax.plot(result["noises"], np.sqrt(result["var"][k]).mean(axis=0))
+        ax.set_title(f"{method}: Std [Hz]")
+        ax.set_xlabel("Rauschstärke")
+        print(method, "Bias:", np.round(result["bias"][k].mean(axis=0), 3),
+              "Std:", np.round(np.sqrt(result["var"][k]).mean(axis=0), 3))
+    fig.tight_layout()
+    plt.show()
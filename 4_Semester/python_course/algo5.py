@@ -0,0 +1,61 @@
+import time
+
+import audio_cache
+import playback
+import redraw
+import stft
+import matplotlib.pyplot as plt
+
+# Zeichnet nur über redraw und darf daher im Hintergrund-Thread der GUI laufen
+BACKGROUND = True
+
+# Algo 5: Spektrogramm (Streaming-STFT)
+
+BLOCK = 16384          # Samples pro Block, der an die STFT gehängt wird
+UPDATE_INTERVAL = 0.2  # Sekunden zwischen zwei Zwischenständen
+
+def run(value, value2, fig, fileName, saveValue=None):
+    audio = audio_cache.load(fileName)
+    data, fs = audio.data, audio.fs
+    if data.ndim > 1:
+        # Spektrogramm des Downmix, wenn alle Kanäle gewählt sind
+        data = audio.get("mono", lambda: audio.data.mean(axis=1))
+
+    # value ∈ [0, 100] → Fensterlänge 64 ... 4096 Samples
+    nperseg = 2 ** (6 + round(value / 100 * 6))
+    # value2 ∈ [0, 100] → Überlappung 0 ... 95 %
+    overlap = min(0.95, value2 / 100)
+    hop = max(1, int(nperseg * (1 - overlap)))
+
+    # Engine pro (Datei, Fenster, Vorschub) gecacht: bereits berechnete Frames bleiben erhalten.
+    # Der Ring deckt die ganze Datei ab (lange Dateien: nur jeder stride-te Frame)
+    engine = stft.engine(audio.key, nperseg, hop, fs, data.shape[0])
+
+    plotter = redraw.get(fig)
+    plotter.layout("algo5", 2, 1, ["Signal (Zeit)", "Spektrogramm [dB]"])
+    plotter.plot(0, audio.t, data)
+
+    def show():
+        if engine.count == 0:
+            return
+        image = engine.image()
+        top = float(image.max())
+        thinned = f" (jeder {engine.stride}.)" if engine.stride > 1 else ""
+        plotter.suptitle(f"Fenster = {nperseg}, Überlappung = {overlap * 100:.0f} %, "
+                         f"Frames = {engine.count}{thinned}", fontsize=16)
+        plotter.image(1, image, engine.extent(), cmap='magma', clim=(top - 80, top))
+        plotter.draw()
+
+    # Blöcke nach und nach anhängen und das Bild zwischendurch aktualisieren
+    last = time.perf_counter()
+    for _ in engine.feed(data, BLOCK):
+        if time.perf_counter() - last > UPDATE_INTERVAL:
+            show()
+            last = time.perf_counter()
+    show()
+
+    playback.play(data, fs, saveValue)
+
+if __name__ == '__main__':
+    run(50, 50, plt.figure(), "flying-mosquito-105770.mp3")
+    plt.show()
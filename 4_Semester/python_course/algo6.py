@@ -0,0 +1,42 @@
+import fir
+import graph
+import redraw
+import matplotlib.pyplot as plt
+
+# Zeichnet nur über redraw und darf daher im Hintergrund-Thread der GUI laufen
+BACKGROUND = True
+
+# Algo 6: Kette aus Mischer (algo1), Filter (algo2) und Spektralverschiebung (algo4)
+
+P = 10
+M = 40
+N = 81
+
+def run(value, value2, fig, fileName, saveValue=None):
+    source = graph.Load(fileName)
+    audio = source.audio
+    fs = audio.fs
+    nfft = audio.nfft
+
+    # value2 → Mischfrequenz wie algo1, value → Verschiebung wie algo4
+    f_mix = (value2 / 100.0) * 0.6 * fs
+    shift = int((value / 100.0) * (nfft // 2))
+
+    # Mischen und Filtern bleiben gespeichert, solange nur value sich ändert
+    filtered = graph.Normalize(graph.Fir(graph.Mix(source, f_mix), fir.gaussSine(P, M, N), key=("gaussSine", P, M, N)))
+    shifted = graph.Normalize(graph.Shift(filtered, shift))
+
+    plotter = redraw.get(fig)
+    plotter.layout("algo6", 2, 2, ["Gefiltertes Mischergebnis (Zeit)", "Gefiltertes Mischergebnis (Spektrum)",
+                                   "Verschoben (Zeit)", "Verschoben (Spektrum)"])
+    plotter.suptitle(f"Mischfrequenz: {f_mix:.2f} Hz, Filter P={P}, shift={shift}", fontsize=14)
+
+    graph.execute([graph.Plot(plotter, 0, filtered), graph.Plot(plotter, 1, graph.Spectrum(filtered)),
+                   graph.Plot(plotter, 2, shifted), graph.Plot(plotter, 3, graph.Spectrum(shifted)),
+                   graph.Play(shifted, saveValue)])
+
+    plotter.draw()
+
+if __name__ == '__main__':
+    run(30, 40, plt.figure(), "flying-mosquito-105770.mp3")
+    plt.show()
@@ -0,0 +1,33 @@
+import graph
+import redraw
+import matplotlib.pyplot as plt
+
+# Zeichnet nur über redraw und darf daher im Hintergrund-Thread der GUI laufen
+BACKGROUND = True
+
+# Algo 7: Frequenzverschiebung wie algo4, aber als Einseitenband-Mischer mit
+# Hilbert-Transformator (siehe hilbert.py). H(x) wird einmal pro Datei
+# berechnet und gespeichert, beim Verschieben des Sliders bleibt nur der
+# Oszillator.
+
+def run(value, value2, fig, fileName, saveValue=None):
+    source = graph.Load(fileName)
+    fs = source.audio.fs
+
+    # Verschiebung in Hz (value ∈ 0–100 → 0 bis fs/2, wie die Bins in algo4)
+    shift = (value / 100.0) * fs / 2
+
+    shifted = graph.Ssb(source, shift)
+
+    plotter = redraw.get(fig)
+    plotter.layout("algo7", 2, 1, ["Verschobenes Signal (Zeit)", "Verschobenes Signal (Spektrum)"], tight=False)
+    plotter.suptitle(fileName + f'     fs={fs} Hz     shift={shift:.1f} Hz', fontsize=16)
+
+    graph.execute([graph.Plot(plotter, 0, shifted), graph.Plot(plotter, 1, graph.Spectrum(shifted)),
+                   graph.Play(shifted, saveValue)])
+
+    plotter.draw()
+
+if __name__ == '__main__':
+    run(20, 0, plt.figure(), "flying-mosquito-105770.mp3")
+    plt.show()
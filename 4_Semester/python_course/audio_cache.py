@@ -0,0 +1,178 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import soundfile as sf
+
+import resample
+import sample_store
+import spectral
+import timing
+
+# Prozessweiter Cache für dekodierte Audiodateien und daraus abgeleitete Größen
+# (Zeitachse, Spektrum, ...). Schlüssel: (Pfad, mtime, Kanalauswahl, Rate).
+# Der Speicher ist in Bytes begrenzt, bei Überschreitung wird LRU verdrängt.
+# Dateien aus dem Sample-Store (sample_store.py) sind nur eingeblendet (memmap).
+
+MAX_BYTES = 512 * 1024 * 1024
+# Analyse-Rate: höher abgetastete Dateien werden beim Laden auf diese Rate
+# heruntergerechnet (None = Originalrate). Wird von der GUI gesetzt.
+RATE = None
+# Kanalauswahl: Kanalnummer, "mid" ((L+R)/2), "side" ((L-R)/2) oder "all"
+# (frames x Kanäle, alle Kanäle in einem Durchgang). Ebenfalls von der GUI gesetzt.
+CHANNEL = 0
+
+
+def select(data, channel):
+    # Auswahl bzw. Downmix ohne Kopie, wo möglich (Einzelkanal ist eine Sicht)
+    if data.ndim == 1:
+        return np.zeros_like(data) if channel == "side" else data
+    if data.shape[1] == 1:
+        data = data[:, 0]
+        return np.zeros_like(data) if channel == "side" else data
+    if channel is None or channel == "all":
+        return data
+    if channel == "mid":
+        return data.mean(axis=1)
+    if channel == "side":
+        return (data[:, 0] - data[:, 1]) / 2
+    return data[:, min(channel, data.shape[1] - 1)]
+
+
+class AudioEntry:
+    def __init__(self, cache, key, data, fs):
+        self.cache = cache
+        self.key = key
+        self.data = data
+        self.fs = fs
+        self.nt = data.shape[0]
+        self.ts = 1 / fs
+        self.T = self.nt * self.ts
+        self.nfft = spectral.fastLength(self.nt)
+        self.products = {}
+        self.nbytes = data.nbytes
+
+    def get(self, name, compute):
+        # Abgeleitete Größe einmal berechnen und mit dem Eintrag cachen
+        with self.cache.lock:
+            if name in self.products:
+                return self.products[name]
+        with timing.stage("audio." + name):
+            value = compute()
+        with self.cache.lock:
+            if name not in self.products:
+                self.products[name] = value
+                size = getattr(value, "nbytes", 0)
+                self.nbytes += size
+                # Bereits verdrängte Einträge zählen nicht mehr zum Cache
+                if self.cache.entries.get(self.key) is self:
+                    self.cache.resize(self, size)
+            return self.products[name]
+
+    @property
+    def t(self):
+        return self.get("t", self.time)
+
+    def time(self):
+        # Abschnittsweise, damit kein int64-Zwischenarray voller Länge entsteht
+        t = np.empty(self.nt, spectral.dtypes()[0])
+        for i in range(0, self.nt, spectral.CHUNK):
+            np.multiply(np.arange(i, min(self.nt, i + spectral.CHUNK)), self.ts,
+                        out=t[i:i + spectral.CHUNK], casting="same_kind")
+        return t
+
+    @property
+    def rfft(self):
+        # Halbspektrum der auf nfft aufgefüllten Daten
+        return self.get("rfft", lambda: spectral.rfft(self.data, self.nfft))
+
+    @property
+    def f(self):
+        return spectral.frequencies(self.nfft, self.fs)
+
+    @property
+    def spectrum(self):
+        # Betragsspektrum, zentriert und auf nt normiert
+        return self.get("spectrum", lambda: spectral.magnitude(self.data, self.nt, self.nfft))
+
+
+class AudioCache:
+    def __init__(self, maxBytes=MAX_BYTES):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def key(self, fileName, channel="all", rate=None):
+        path = os.path.abspath(fileName)
+        return (path, os.stat(path).st_mtime_ns, channel, rate, spectral.FLOAT32)
+
+    def load(self, fileName, channel="all", rate=None):
+        key = self.key(fileName, channel, rate)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Bereits umgewandelt: float32-Samples ohne Kopie aus dem Sample-Store,
+        # sonst dekodieren und die Umwandlung für das nächste Mal einreihen
+        stored = sample_store.mapped(fileName)
+        if stored is not None:
+            data, fs = stored
+            data = select(data, channel)
+        else:
+            with timing.stage("decode"):
+                data, fs = sf.read(fileName, dtype="float32" if spectral.FLOAT32 else "float64")
+            sample_store.schedule(fileName, data, fs)
+            # Einzelkanal kompakt ablegen, damit der Rest freigegeben wird
+            data = select(data, channel)
+            if data.ndim == 1:
+                data = np.ascontiguousarray(data)
+        if rate is not None and rate < fs:
+            with timing.stage("resample"):
+                data, fs = resample.resample(data, fs, rate)
+                data = data.astype(spectral.dtypes()[0], copy=False)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = AudioEntry(self, key, data, fs)
+                self.entries[key] = entry
+                self.resize(entry, entry.nbytes)
+            return entry
+
+    def resize(self, entry, size):
+        self.bytes += size
+        # Älteste Einträge verdrängen, den aktuellen aber nie
+        while self.bytes > self.maxBytes and len(self.entries) > 1:
+            key, old = next(iter(self.entries.items()))
+            if old is entry:
+                self.entries.move_to_end(key)
+                continue
+            del self.entries[key]
+            self.bytes -= old.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.entries), "bytes": self.bytes}
+
+
+CACHE = AudioCache()
+
+
+def load(fileName, channel=None, rate=None):
+    return CACHE.load(fileName, CHANNEL if channel is None else channel, RATE if rate is None else rate)
@@ -0,0 +1,47 @@
+from functools import lru_cache
+
+import numpy as np
+
+import spectral
+
+# Signalbank für die Demos mit vielen Frequenzen: alle Töne (und Produkte von
+# Tonpaaren wie beim Mischer) entstehen per Broadcasting als ein 2-D-Array,
+# Samples entlang Achse 0, ein Signal pro Spalte. Die Spektren aller Spalten
+# kommen aus einer einzigen rfft entlang Achse 0, die Frequenzachse ist gecacht.
+
+
+@lru_cache(maxsize=32)
+def timeAxis(nt, ts):
+    t = np.arange(nt) * ts
+    t.flags.writeable = False
+    return t
+
+
+def tones(freqs, nt, ts, amplitude=1.0, phase=0.0, float32=None):
+    # (nt, len(freqs)): Spalte k = amplitude * cos(2π f_k t + phase)
+    real, _ = spectral.dtypes(float32)
+    t = timeAxis(nt, ts).astype(real, copy=False)
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=real))
+    bank = np.multiply.outer(t, 2 * np.pi * freqs)
+    bank += phase
+    np.cos(bank, out=bank)
+    bank *= amplitude
+    return bank
+
+
+def mixer(freqs1, freqs2, nt, ts, float32=None):
+    # Tonpaare und ihre Produkte wie beim Mischer in einem Array (nt, 3K):
+    # Spalten [x1_1..x1_K | x2_1..x2_K | x1_k * x2_k], jede Kosinusschwingung nur einmal
+    real, _ = spectral.dtypes(float32)
+    k = len(freqs1)
+    bank = np.empty((nt, 3 * k), real)
+    bank[:, :2 * k] = tones(np.concatenate((freqs1, freqs2)), nt, ts, float32=float32)
+    np.multiply(bank[:, :k], bank[:, k:2 * k], out=bank[:, 2 * k:])
+    return bank
+
+
+def spectra(bank, ts, nt=1, nfft=None, float32=None):
+    # Zentrierte Betragsspektren aller Spalten (Achse 0) und die passende Frequenzachse;
+    # nt=1 entspricht np.abs(np.fft.fft(x)) ohne Normierung
+    nfft = bank.shape[0] if nfft is None else nfft
+    return spectral.frequencies(nfft, 1 / ts), spectral.magnitude(bank, nt, nfft, float32)
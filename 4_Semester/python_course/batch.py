@@ -0,0 +1,138 @@
+import argparse
+import csv
+import glob
+import importlib
+import itertools
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import soundfile as sf
+
+import discovery
+import spectral
+
+# Stapelverarbeitung ohne GUI: beliebige run()-Skripte über ein Raster aus
+# value x value2 x Sounddateien in einem Prozesspool rechnen. Abbildungen
+# werden als PNG gespeichert, Audio als WAV geschrieben statt abgespielt.
+# Laufzeit und Spitzenspeicher je Job landen in summary.csv. Der Spitzenwert
+# von tracemalloc (--trace) ist genau, verlangsamt die Jobs aber deutlich;
+# rss_mb ist der Höchststand des Worker-Prozesses bis einschließlich des Jobs.
+
+SOUND_TYPES = (".ogg", ".wav", ".mp3")
+
+
+class FileSink:
+    # Ersetzt den Wiedergabedienst: schreibt das Audio in eine Datei
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.written = None
+
+    def play(self, data, fs):
+        sf.write(self.fileName, data, int(fs))
+        self.written = self.fileName
+
+
+def parseGrid(text):
+    # "0,25,50" oder "start:stop:step" (stop inklusive)
+    if ":" in text:
+        start, stop, step = (int(v) for v in text.split(":"))
+        return list(range(start, stop + 1, step))
+    return [int(v) for v in text.split(",") if v]
+
+
+def soundFiles(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files += [os.path.join(pattern, f) for f in sorted(os.listdir(pattern)) if f.endswith(SOUND_TYPES)]
+        else:
+            files += sorted(glob.glob(pattern))
+    return files
+
+
+def maxRss():
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def render(job):
+    script, value, value2, fileName, outDir, size, dpi, trace, float32 = job
+    spectral.FLOAT32 = float32
+    name = "{0}_{1}_{2}_{3}".format(script.rsplit('.', 1)[0],
+                                   os.path.splitext(os.path.basename(fileName))[0], value, value2)
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    sink = FileSink(os.path.join(outDir, name + ".wav"))
+    row = {"script": script, "file": fileName, "value": value, "value2": value2,
+           "png": "", "wav": "", "seconds": 0.0, "peak_mb": "", "rss_mb": 0.0, "error": ""}
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(script.rsplit('.', 1)[0])
+        module.run(value, value2, fig, fileName, sink)
+        fig.savefig(os.path.join(outDir, name + ".png"), dpi=dpi)
+        row["png"] = name + ".png"
+        row["wav"] = os.path.basename(sink.written) if sink.written else ""
+    except Exception as err:
+        row["error"] = "{0}: {1}".format(type(err).__name__, err)
+    row["seconds"] = round(time.perf_counter() - start, 4)
+    if trace:
+        row["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    row["rss_mb"] = round(maxRss(), 1)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run()-Skripte ohne GUI über ein Parameterraster rechnen")
+    parser.add_argument("--scripts", nargs="*", help="Skripte (Standard: alle gefundenen)")
+    parser.add_argument("--files", nargs="*", default=["Sound"], help="Sounddateien, Globs oder Verzeichnisse")
+    parser.add_argument("--values", default="0:100:50", help="z. B. 0,10,20 oder 0:100:10")
+    parser.add_argument("--values2", default="0:100:50")
+    parser.add_argument("--out", default="batch_output")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--size", type=float, nargs=2, default=(16, 9), help="Abbildungsgröße in Zoll")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--trace", action="store_true", help="Spitzenspeicher mit tracemalloc messen (langsam)")
+    parser.add_argument("--float32", action="store_true", help="schlanker float32-Modus (spectral.FLOAT32)")
+    args = parser.parse_args()
+
+    scripts = args.scripts or discovery.scan(".")
+    files = soundFiles(args.files)
+    os.makedirs(args.out, exist_ok=True)
+
+    # Nach Datei sortiert, damit ein Worker dieselbe Datei aus seinem Cache nutzt
+    jobs = [(script, value, value2, fileName, args.out, tuple(args.size), args.dpi, args.trace, args.float32)
+            for fileName, script, value, value2 in itertools.product(
+                files, scripts, parseGrid(args.values), parseGrid(args.values2))]
+    print("{0} Jobs: {1} Skripte x {2} Dateien".format(len(jobs), len(scripts), len(files)))
+
+    start = time.perf_counter()
+    summary = os.path.join(args.out, "summary.csv")
+    with ProcessPoolExecutor(args.workers) as pool, open(summary, "w", newline="") as out:
+        writer = None
+        for row in pool.map(render, jobs, chunksize=4):
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            print("{script} {file} {value}/{value2}: {seconds:.3f} s, RSS {rss_mb:.1f} MB {error}".format(**row))
+    print("Fertig in {0:.1f} s, Zusammenfassung: {1}".format(time.perf_counter() - start, summary))
+
+
+if __name__ == '__main__':
+    main()
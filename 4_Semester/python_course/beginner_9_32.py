@@ -1,6 +1,7 @@
-import numpy as np
 import matplotlib.pyplot as plt
 
+import bank
+
 def run(value, value2, fig, a=None, b=None):
     fig.clf()               # Löscht das aktuelle Figure-Objekt (damit beim erneuten Aufruf keine alten Plots übrig bleiben)
     fig.tight_layout()      # Optimiert das Layout, damit sich die Subplots nicht überlappen
@@ -9,31 +10,21 @@ def run(value, value2, fig, a=None, b=None):
     T_s = 0.002             # Abtastzeit (Sampling-Intervall) = 2 ms = 0.002 Sekunden
     f_s = 1 / T_s           # Abtastfrequenz fs = 500 Hz
     N_T = 500               # Anzahl der Abtastpunkte
-    t = np.arange(N_T) * T_s  # Zeitachse: 0, T_s, 2*T_s, ..., (N_T-1)*T_s
+    t = bank.timeAxis(N_T, T_s)  # Zeitachse: 0, T_s, 2*T_s, ..., (N_T-1)*T_s (gecacht)
 
     # === Umrechnung der Eingabewerte in Frequenzen im Bereich 0 bis 0.625 * fs ===
     # Die Werte 'value' und 'value2' sollen z. B. von 0–100 skaliert werden
     freq1 = value / 100 * 0.625 * f_s     # Frequenz 1 für erste Kosinusschwingung
     freq2 = value2 / 100 * 0.625 * f_s    # Frequenz 2 für zweite Kosinusschwingung
 
-    # === Erzeuge Kosinusschwingungen mit den jeweiligen Frequenzen ===
-    x1 = np.cos(2 * np.pi * freq1 * t)    # Erste Schwingung
-    x2 = np.cos(2 * np.pi * freq2 * t)    # Zweite Schwingung
-
-    # === Mischen durch elementweise Multiplikation ===
-    mixed = x1 * x2                       # Multiplikation beider Signale
-
-    # === Funktion zur Berechnung des Betrags der FFT mit verschobener Achse ===
-    def compute_fft(x):
-        fft_vals = np.fft.fftshift(np.fft.fft(x))         # FFT berechnen und Nullfrequenz in die Mitte verschieben
-        freqs = np.fft.fftshift(np.fft.fftfreq(N_T, T_s))  # Frequenzachse erzeugen, ebenfalls verschoben
-        magnitude = np.abs(fft_vals)                      # Betragsspektrum
-        return freqs, magnitude
+    # === Signalbank: Spalten x1, x2 und die Mischung x1 * x2 ===
+    signals = bank.mixer([freq1], [freq2], N_T, T_s)  # Erste und zweite Schwingung, Mischung durch Multiplikation
+    x1, x2, mixed = signals.T
 
-    # === Berechnung der Spektren ===
-    f1, mag1 = compute_fft(x1)
-    f2, mag2 = compute_fft(x2)
-    f_mixed, mag_mixed = compute_fft(mixed)
+    # === Betragsspektren aller drei Spalten mit einer FFT, Nullfrequenz in der Mitte ===
+    freqs, mags = bank.spectra(signals, T_s)
+    f1 = f2 = f_mixed = freqs              # Frequenzachse ist für alle gleich (gecacht)
+    mag1, mag2, mag_mixed = mags.T
 
     # === Plot der Zeitverläufe ===
     ax1 = fig.add_subplot(3, 2, 1)
@@ -0,0 +1,247 @@
+import argparse
+import gc
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+import soundfile as sf
+
+import audio_cache
+import discovery
+import graph
+import sample_store
+import timing
+
+# Benchmark und Regressionsprüfung der run()-Skripte ohne GUI und Audiohardware.
+# Synthetische WAV-Dateien (Sweep + Rauschen) von 1 s bis 1 h bei mehreren
+# Abtastraten; jedes Skript zeichnet auf eine Agg-Figure, das Audio wird
+# verworfen. Pro Fall ein kalter Aufruf (leere Caches, Datei wird dekodiert)
+# und mehrere warme (Slider jeweils um eins weiter, wie beim Ziehen). Die
+# Schritte aus timing werden zu den Phasen decode, dsp, fft und draw
+# zusammengefasst. Der Spitzenspeicher (tracemalloc) stammt aus einem
+# eigenen kalten Lauf, weil tracemalloc die Zeiten verfälscht.
+# Mit --update werden die Ergebnisse zur Baseline; sonst wird verglichen und
+# bei einer Verschlechterung über die Toleranz mit Status 1 beendet.
+
+DURATIONS = (1, 10, 60, 600, 3600)   # Sekunden
+RATES = (8000, 22050, 44100)
+BLOCK = 1 << 20                      # Samples pro Schreibvorgang beim Erzeugen
+BASELINE = "bench_baseline.json"
+TOLERANCE = 0.25                     # erlaubte relative Verschlechterung
+SLACK_MS = 5.0                       # absolute Toleranz für kurze Zeiten
+SLACK_MB = 1.0
+METRICS = (("cold_ms", SLACK_MS), ("warm_ms", SLACK_MS), ("peak_mb", SLACK_MB))
+
+# Schritt aus timing -> Phase. Nicht aufgeführte Schritte sind geschachtelt
+# (z. B. "load" um "decode") oder laufen im Hintergrund ("transcode").
+PHASES = {"decode": "decode", "resample": "decode",
+          "dsp": "dsp", "fir": "dsp", "audio.t": "dsp", "audio.mono": "dsp",
+          "fft": "fft", "stft": "fft", "audio.rfft": "fft", "audio.spectrum": "fft",
+          "layout": "draw", "blit": "draw", "draw": "draw"}
+
+
+class NullSink:
+    # Ersetzt den Wiedergabedienst: Audio wird angenommen und verworfen
+    def __init__(self):
+        self.samples = 0
+
+    def play(self, data, fs):
+        self.samples += np.asarray(data).shape[0]
+
+
+class TimedCanvas(FigureCanvasAgg):
+    def draw(self):
+        with timing.stage("draw"):
+            super().draw()
+
+
+def synthesize(fileName, duration, fs):
+    # Exponentieller Sweep 50 Hz ... 0.4 fs plus Rauschen, blockweise geschrieben
+    rng = np.random.default_rng(int(duration * fs))
+    n = int(duration * fs)
+    f0, f1 = 50.0, 0.4 * fs
+    k = np.log(f1 / f0) / duration
+    tmp = fileName + ".tmp.wav"
+    with sf.SoundFile(tmp, "w", samplerate=fs, channels=1, subtype="PCM_16") as out:
+        for i in range(0, n, BLOCK):
+            t = np.arange(i, min(n, i + BLOCK)) / fs
+            out.write(0.5 * np.sin(2 * np.pi * f0 * np.expm1(k * t) / k) + 0.05 * rng.standard_normal(t.size))
+    os.replace(tmp, fileName)
+
+
+def signals(directory, durations, rates):
+    # (Dauer, Rate, Datei); vorhandene Dateien werden wiederverwendet
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for duration in durations:
+        for fs in rates:
+            fileName = os.path.join(directory, "bench_{0:g}s_{1}.wav".format(duration, fs))
+            if not os.path.exists(fileName):
+                print("Erzeuge " + fileName)
+                synthesize(fileName, duration, fs)
+            files.append((duration, fs, fileName))
+    return files
+
+
+def phases(stages, total):
+    # Summen je Phase; "other" ist die nicht zugeordnete Zeit des Aufrufs
+    result = {}
+    for name, ms in stages.items():
+        phase = PHASES.get(name)
+        if phase is not None:
+            result[phase] = result.get(phase, 0.0) + ms
+    result["other"] = max(0.0, total - sum(result.values()))
+    return result
+
+
+def call(module, fig, fileName, value, value2):
+    # Ein Aufruf: (Gesamtzeit in ms, Schritte in ms)
+    timing.begin()
+    start = time.perf_counter()
+    module.run(value, value2, fig, fileName, NullSink())
+    if "draw" not in timing.current():
+        # Skripte, die nicht selbst zeichnen, einmal rastern wie in der GUI
+        fig.canvas.draw()
+    return (time.perf_counter() - start) * 1000, timing.current()
+
+
+def clear():
+    audio_cache.CACHE.clear()
+    graph.GRAPH.clear()
+    gc.collect()
+
+
+def measure(module, fileName, value, value2, runs, size):
+    fig = Figure(figsize=size)
+    TimedCanvas(fig)
+    clear()
+    cold, stages = call(module, fig, fileName, value, value2)
+    row = {"cold_ms": cold, "cold": phases(stages, cold)}
+
+    # Warm: gleiche Figure, Slider verschoben, Caches gefüllt
+    totals, warm = [], []
+    for k in range(1, runs + 1):
+        total, stages = call(module, fig, fileName, min(100, value + k), value2)
+        totals.append(total)
+        warm.append(phases(stages, total))
+    row["warm_ms"] = statistics.median(totals)
+    row["warm"] = {phase: statistics.median(p.get(phase, 0.0) for p in warm) for phase in ("dsp", "fft", "draw", "other")}
+
+    # Spitzenspeicher eines kalten Aufrufs
+    clear()
+    timing.TIMER.enabled = False
+    tracemalloc.start()
+    try:
+        fig = Figure(figsize=size)
+        TimedCanvas(fig)
+        module.run(value, value2, fig, fileName, NullSink())
+        fig.canvas.draw()
+        row["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+        timing.TIMER.enabled = True
+    clear()
+    return row
+
+
+def compare(results, baseline, tolerance):
+    # Verschlechterungen gegenüber der Baseline als Textzeilen
+    failures = []
+    for key, row in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if "error" in row:
+            failures.append("{0}: {1}".format(key, row["error"]))
+            continue
+        for metric, slack in METRICS:
+            if metric in base and row[metric] > base[metric] * (1 + tolerance) + slack:
+                failures.append("{0}: {1} {2:.1f} statt {3:.1f}".format(key, metric, row[metric], base[metric]))
+    return failures
+
+
+def parseList(text, kind=int):
+    return [kind(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Laufzeit und Speicher der run()-Skripte messen und mit einer Baseline vergleichen")
+    parser.add_argument("--scripts", nargs="*", help="Skripte (Standard: alle gefundenen)")
+    parser.add_argument("--durations", default=",".join(map(str, DURATIONS)), help="Dauer der Testsignale in s, z. B. 1,10,60")
+    parser.add_argument("--rates", default=",".join(map(str, RATES)), help="Abtastraten in Hz")
+    parser.add_argument("--value", type=int, default=10)
+    parser.add_argument("--value2", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=3, help="warme Aufrufe pro Fall")
+    parser.add_argument("--size", type=float, nargs=2, default=(16, 9), help="Abbildungsgröße in Zoll")
+    parser.add_argument("--out", default="bench_output", help="Testsignale und Ergebnisse")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--update", action="store_true", help="Ergebnisse als Baseline speichern")
+    parser.add_argument("--store", action="store_true",
+                        help="Sample-Store benutzen (kalte Aufrufe lesen per memmap statt zu dekodieren)")
+    args = parser.parse_args()
+
+    files = signals(os.path.join(args.out, "signals"), parseList(args.durations, float), parseList(args.rates))
+    sample_store.ENABLED = args.store
+    if args.store:
+        sample_store.STORE = sample_store.SampleStore(os.path.join(args.out, ".samples"))
+        for _, _, fileName in files:
+            if sample_store.STORE.header(fileName) is None:
+                sample_store.STORE.write(fileName)
+
+    results = {}
+    for script in args.scripts or discovery.scan("."):
+        name = script.rsplit('.', 1)[0]
+        module = importlib.import_module(name)
+        for duration, fs, fileName in files:
+            key = "{0}|{1:g}s|{2}Hz".format(name, duration, fs)
+            try:
+                row = measure(module, fileName, args.value, args.value2, args.runs, tuple(args.size))
+            except Exception as err:
+                row = {"error": "{0}: {1}".format(type(err).__name__, err)}
+                print("{0}: {1}".format(key, row["error"]))
+                results[key] = row
+                continue
+            results[key] = row
+            print("{0}: kalt {1:.1f} ms ({2})  warm {3:.1f} ms ({4})  Spitze {5:.1f} MB".format(
+                key, row["cold_ms"], " ".join("{0} {1:.1f}".format(p, ms) for p, ms in row["cold"].items()),
+                row["warm_ms"], " ".join("{0} {1:.1f}".format(p, ms) for p, ms in row["warm"].items()),
+                row["peak_mb"]))
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "bench_results.json"), "w") as out:
+        json.dump(results, out, indent=1)
+
+    try:
+        baseline = json.load(open(args.baseline))
+    except (OSError, ValueError):
+        baseline = {}
+    if args.update:
+        baseline.update({key: row for key, row in results.items() if "error" not in row})
+        with open(args.baseline, "w") as out:
+            json.dump(baseline, out, indent=1)
+        print("Baseline gespeichert: " + args.baseline)
+        return 0
+
+    failures = compare(results, baseline, args.tolerance)
+    missing = sum(key not in baseline for key in results)
+    if missing:
+        print("{0} Fälle ohne Baseline (mit --update anlegen)".format(missing))
+    if failures:
+        print("Verschlechterungen:\n  " + "\n  ".join(failures))
+        return 1
+    print("Keine Verschlechterung gegenüber " + args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import ast
+import json
+import os
+
+# Findet Skripte mit einer run-Funktion, ohne sie zu importieren: der Quelltext
+# wird nur geparst (AST). Ergebnisse landen in einem Manifest, das pro Datei
+# über die mtime invalidiert wird; unveränderte Dateien werden nicht neu geparst.
+
+MANIFEST = "SignalProcessingGUI.manifest.json"
+
+
+def inspectScript(path):
+    try:
+        tree = ast.parse(open(path, encoding="utf-8").read(), path)
+    except (SyntaxError, UnicodeDecodeError, OSError) as err:
+        print("Script " + os.path.basename(path) + " not parsed: " + str(err))
+        return {"run": False}
+    run = any(isinstance(node, ast.FunctionDef) and node.name == "run" for node in tree.body)
+    return {"run": run}
+
+
+def scan(directory=".", manifest=MANIFEST):
+    try:
+        cache = json.load(open(os.path.join(directory, manifest)))
+    except (OSError, ValueError):
+        cache = {}
+
+    entries = {}
+    changed = False
+    for file in sorted(os.listdir(directory)):
+        if not file.endswith(".py"):
+            continue
+        mtime = os.stat(os.path.join(directory, file)).st_mtime_ns
+        entry = cache.get(file)
+        if entry is None or entry.get("mtime") != mtime:
+            entry = dict(inspectScript(os.path.join(directory, file)), mtime=mtime)
+            changed = True
+        entries[file] = entry
+
+    if changed or entries.keys() != cache.keys():
+        try:
+            json.dump(entries, open(os.path.join(directory, manifest), "w"), indent=1)
+        except OSError as err:
+            print("Manifest not saved: " + str(err))
+    return [file for file, entry in entries.items() if entry["run"]]
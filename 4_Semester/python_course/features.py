@@ -0,0 +1,308 @@
+import argparse
+import json
+import multiprocessing as multiproc
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import soundfile as sf
+
+import sample_store
+import spectral
+
+# Merkmalsindex der Sound-Bibliothek: pro Datei einmal kompakte Kennwerte
+# (Dauer, fs, Kanäle, RMS, Spitzenfrequenz, spektraler Schwerpunkt und
+# Bandbreite, Energieanteile in Frequenzbändern). Gerechnet wird blockweise
+# (gemitteltes Leistungsspektrum, summiert über die Kanäle: gegenphasige
+# Stereo-Aufnahmen löschen sich nicht aus wie im Downmix) in einem Prozesspool;
+# der Index liegt als JSON neben dem Manifest und wird wie dieses über
+# mtime/Größe der Quelle invalidiert. Nur neue oder geänderte Dateien werden
+# neu gerechnet. Die Dateiauswahl sortiert und filtert damit, ohne zu dekodieren.
+
+INDEX = "SignalProcessingGUI.features.json"
+SOUND_TYPES = (".ogg", ".wav", ".mp3")
+NFFT = 4096                  # Frame des gemittelten Spektrums
+BLOCK = 16 * NFFT            # Samples pro Lesevorgang
+SAVE_INTERVAL = 2.0          # s zwischen Zwischenständen während der Berechnung
+# Worker nicht per fork aus einem Prozess mit laufenden Threads (GUI) erzeugen:
+# der Forkserver startet sauber und forkt die Worker von sich aus
+CONTEXT = "forkserver" if "forkserver" in multiproc.get_all_start_methods() else None
+# Bänder (Schlüssel, untere, obere Grenze in Hz; None = fs/2), Anteil in %
+BANDS = (("bass", 0, 250), ("low", 250, 1000), ("mid", 1000, 4000), ("high", 4000, None))
+
+# Spalten der Dateiauswahl: (Schlüssel, Überschrift, Format)
+FIELDS = (("duration", "Dauer s", "{0:.1f}"), ("fs", "fs Hz", "{0:.0f}"), ("channels", "Kanäle", "{0:.0f}"),
+          ("rms", "RMS dBFS", "{0:.1f}"), ("peak", "Spitze Hz", "{0:.0f}"),
+          ("centroid", "Schwerpunkt Hz", "{0:.0f}"), ("bandwidth", "Bandbreite Hz", "{0:.0f}")) + \
+    tuple((key, "{0}-{1} Hz %".format(lo, hi) if hi else "> {0} Hz %".format(lo), "{0:.1f}") for key, lo, hi in BANDS)
+KEYS = {key for key, _, _ in FIELDS}
+
+
+def soundFiles(directories=("Sound", ".")):
+    # Sound-Dateien der Verzeichnisse ("." ohne Pfadpräfix), sortiert
+    files = set()
+    for directory in directories:
+        if os.path.isdir(directory):
+            for file in os.listdir(directory):
+                if file.endswith(SOUND_TYPES):
+                    files.add(file if directory == "." else os.path.join(directory, file))
+    return sorted(files)
+
+
+def blocks(fileName):
+    # (Blöcke frames x Kanäle, fs, Kanäle); aus dem Sample-Store per
+    # memmap, sonst blockweise dekodiert (nie die ganze Datei im Speicher)
+    stored = sample_store.mapped(fileName)
+    if stored is not None:
+        data, fs = stored
+        return (data[i:i + BLOCK] for i in range(0, data.shape[0], BLOCK)), fs, data.shape[1]
+    info = sf.info(fileName)
+
+    def decode():
+        with sf.SoundFile(fileName) as f:
+            yield from f.blocks(blocksize=BLOCK, dtype="float32", always_2d=True)
+    return decode(), info.samplerate, info.channels
+
+
+def compute(fileName):
+    source, fs, channels = blocks(fileName)
+    window = np.hanning(NFFT).astype(np.float32)
+    power = np.zeros(NFFT // 2 + 1)
+    carry = np.zeros((0, channels), np.float32)
+    count = n = 0
+    energy = 0.0
+    for x in source:
+        energy += float(np.square(x, dtype=np.float64).sum())
+        n += x.shape[0]
+        if carry.size:
+            x = np.concatenate((carry, x))
+        k = x.shape[0] // NFFT * NFFT
+        carry = x[k:]
+        if k:
+            frames = x[:k].reshape(-1, NFFT, channels) * window[:, None]
+            power += np.square(np.abs(np.fft.rfft(frames, axis=1))).sum(axis=(0, 2))
+            count += k // NFFT
+    if count == 0 and carry.size:
+        # Kürzer als ein Frame: aufgefüllt ein einziges Spektrum
+        frame = np.pad(carry, ((0, NFFT - carry.shape[0]), (0, 0))) * window[:, None]
+        power += np.square(np.abs(np.fft.rfft(frame, axis=0))).sum(axis=1)
+
+    f = np.fft.rfftfreq(NFFT, 1 / fs)
+    total = power.sum()
+    entry = {"duration": n / fs, "fs": fs, "channels": channels, "frames": n,
+             "rms": 10 * np.log10(energy / (n * channels)) if energy > 0 else None}
+    if total > 0:
+        # Spitze ohne Gleichanteil, Parabel durch die logarithmierten Nachbarn
+        k = 1 + int(np.argmax(power[1:]))
+        level = np.log(power + total * 1e-12)
+        entry["peak"] = float(spectral.parabolic(level, k)) * fs / NFFT
+        entry["centroid"] = float(np.dot(f, power) / total)
+        entry["bandwidth"] = float(np.sqrt(np.dot((f - entry["centroid"]) ** 2, power) / total))
+        for key, lo, hi in BANDS:
+            band = (f >= lo) & (f < (hi or np.inf))
+            entry[key] = float(100 * power[band].sum() / total)
+    return {key: (round(float(value), 3) if isinstance(value, float) else value) for key, value in entry.items()}
+
+
+def analyse(fileName):
+    # Aufgabe für den Prozesspool: (Datei, Merkmale oder Fehler)
+    try:
+        return fileName, compute(fileName)
+    except Exception as err:
+        return fileName, {"error": "{0}: {1}".format(type(err).__name__, err)}
+
+
+def lower():
+    # Worker mit niedriger Priorität, die GUI bleibt bedienbar
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def stamp(fileName):
+    st = os.stat(fileName)
+    return {"mtime": st.st_mtime_ns, "size": st.st_size}
+
+
+class FeatureIndex:
+    def __init__(self, path=INDEX, workers=None):
+        self.path = path
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.thread = None
+        self.wanted = None
+        self.futures = []
+        self.closed = False
+        self.saved = 0.0
+        try:
+            data = json.load(open(path))
+            # Anderes NFFT: alle Spektralwerte neu rechnen
+            self.entries = data["files"] if data.get("nfft") == NFFT else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self.entries = {}
+
+    def get(self, fileName):
+        # Gültige Merkmale oder None (fehlt, Quelle geändert oder nicht lesbar)
+        with self.lock:
+            entry = self.entries.get(fileName)
+        try:
+            if entry is None or any(entry.get(k) != v for k, v in stamp(fileName).items()):
+                return None
+        except OSError:
+            return None
+        return None if "error" in entry else entry
+
+    def stale(self, fileNames):
+        result = []
+        for fileName in fileNames:
+            with self.lock:
+                entry = self.entries.get(fileName)
+            try:
+                if entry is None or any(entry.get(k) != v for k, v in stamp(fileName).items()):
+                    result.append(fileName)
+            except OSError:
+                pass
+        return result
+
+    def update(self, fileNames, progress=None):
+        # Fehlende und geänderte Dateien parallel rechnen; progress(Datei) nach
+        # jeder fertigen Datei. Einträge verschwundener Dateien werden entfernt.
+        with self.lock:
+            gone = [fileName for fileName in self.entries if not os.path.exists(fileName)]
+            for fileName in gone:
+                del self.entries[fileName]
+        todo = [] if self.closed else self.stale(fileNames)
+        finished = []
+        if todo:
+            workers = self.workers or max(1, (os.cpu_count() or 2) - 1)
+            with ProcessPoolExecutor(min(workers, len(todo)), multiproc.get_context(CONTEXT),
+                                     initializer=lower) as pool:
+                # mtime/Größe vor dem Rechnen: ändert sich die Datei währenddessen,
+                # ist der Eintrag gleich wieder veraltet
+                stamps = {fileName: stamp(fileName) for fileName in todo}
+                with self.lock:
+                    self.futures = [pool.submit(analyse, fileName) for fileName in todo]
+                    if self.closed:
+                        self.cancel()
+                for future in as_completed(self.futures):
+                    if future.cancelled():
+                        continue
+                    fileName, entry = future.result()
+                    if "error" in entry:
+                        print("Features: " + fileName + " not analysed: " + entry["error"])
+                    with self.lock:
+                        self.entries[fileName] = dict(entry, **stamps[fileName])
+                    finished.append(fileName)
+                    if time.monotonic() - self.saved > SAVE_INTERVAL:
+                        self.save()
+                    if progress is not None:
+                        progress(fileName)
+            self.futures = []
+        if finished or gone:
+            self.save()
+        return finished
+
+    def save(self):
+        with self.lock:
+            text = json.dumps({"version": 1, "nfft": NFFT, "files": self.entries}, indent=1)
+        try:
+            with open(self.path + ".tmp", "w") as out:
+                out.write(text)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as err:
+            print("Feature index not saved: " + str(err))
+        self.saved = time.monotonic()
+
+    def schedule(self, fileNames, progress=None, done=None):
+        # update() im Hintergrund-Thread; ein weiterer Auftrag während der
+        # Berechnung ersetzt den wartenden und läuft danach
+        with self.lock:
+            self.wanted = (list(fileNames), progress, done)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, daemon=True)
+                self.thread.start()
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+    def close(self):
+        # Wartende Dateien verwerfen (beim Beenden); laufende werden noch fertig
+        with self.lock:
+            self.closed = True
+            self.wanted = None
+            self.cancel()
+
+    def work(self):
+        while True:
+            with self.lock:
+                if self.wanted is None:
+                    self.thread = None
+                    return
+                fileNames, progress, done = self.wanted
+                self.wanted = None
+            try:
+                changed = self.update(fileNames, progress)
+            except Exception as err:
+                print("Features: index not updated: " + str(err))
+                changed = []
+            if done is not None:
+                done(changed)
+
+
+FILTER = re.compile(r"^(\w+)(<=|>=|<|>|=)(-?[\d.]+)(k?)$")
+
+
+def matches(fileName, entry, text):
+    # Filter aus Leerzeichen-getrennten Bedingungen, z. B. "peak>1k duration<10 mosquito":
+    # Schlüssel mit <, <=, >, >=, = und Zahl (k = x1000) oder Teil des Dateinamens.
+    # Dateien ohne Merkmale erfüllen keine Zahlenbedingung.
+    for term in text.split():
+        match = FILTER.match(term)
+        if match is None or match.group(1) not in KEYS:
+            if term.lower() not in fileName.lower():
+                return False
+            continue
+        key, op, number, kilo = match.groups()
+        try:
+            limit = float(number) * (1000 if kilo else 1)
+        except ValueError:
+            return False
+        value = None if entry is None else entry.get(key)
+        if value is None:
+            return False
+        if not {"<": value < limit, "<=": value <= limit, ">": value > limit,
+                ">=": value >= limit, "=": abs(value - limit) <= 0.5}[op]:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merkmalsindex der Sound-Dateien aktualisieren und anzeigen")
+    parser.add_argument("directories", nargs="*", default=["Sound", "."])
+    parser.add_argument("--index", default=INDEX)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--sort", default="duration", help="Schlüssel: " + ", ".join(key for key, _, _ in FIELDS))
+    parser.add_argument("--filter", default="", help='z. B. "peak>1k duration<10"')
+    args = parser.parse_args()
+
+    files = soundFiles(args.directories)
+    index = FeatureIndex(args.index, args.workers)
+    start = time.perf_counter()
+    changed = index.update(files, lambda fileName: print("  " + fileName))
+    print("{0} von {1} Dateien analysiert in {2:.2f} s".format(len(changed), len(files), time.perf_counter() - start))
+
+    rows = [(fileName, index.get(fileName)) for fileName in files]
+    rows = [row for row in rows if matches(row[0], row[1], args.filter)]
+    rows.sort(key=lambda row: (row[1] is None or row[1].get(args.sort) is None,
+                               row[1] and row[1].get(args.sort) or 0))
+    print("\t".join(["Datei"] + [key for key, _, _ in FIELDS]))
+    for fileName, entry in rows:
+        print("\t".join([fileName] + [fmt.format(entry[key]) if entry and entry.get(key) is not None else "-"
+                                      for key, _, fmt in FIELDS]))
+
+
+if __name__ == '__main__':
+    main()
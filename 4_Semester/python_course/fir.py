@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+import spectral
+
+# FIR-Filterung mit automatischer Wahl zwischen direkter Faltung, einer FFT
+# über das ganze Signal und Overlap-Add in Blöcken. Die Kernel-Spektren werden
+# pro (Kernel, FFT-Länge) gecacht, damit z. B. das Verschieben des value-Sliders
+# in algo2 bereits berechnete Filter wiederverwendet. Das Ergebnis entspricht
+# np.convolve(x, h, mode='same') bzw. mode='full'.
+
+DIRECT_TAPS = 64     # bis zu dieser Kernellänge ist np.convolve am schnellsten
+BLOCK_FACTOR = 8     # Blocklänge für Overlap-Add ~ BLOCK_FACTOR * Kernellänge
+MAX_BLOCKS = 256     # Blöcke pro Batch-FFT, begrenzt den Zwischenspeicher
+MAX_SPECTRA = 64
+
+_spectra = OrderedDict()
+
+
+@lru_cache(maxsize=64)
+def gaussSine(P, M=40, N=81):
+    # Gauß-gefensterter Sinus aus algo2: g[i] = exp(-i²/(8M²)) * sin(2πPi/N)
+    i = np.arange(-(N // 2), N // 2 + 1)
+    g = np.exp(-i**2 / (8 * M**2)) * np.sin(2 * np.pi * P * i / N)
+    g.flags.writeable = False
+    return g
+
+
+def kernelSpectrum(h, nfft, key=None):
+    key = (h.tobytes() if key is None else key, nfft)
+    H = _spectra.get(key)
+    if H is None:
+        H = _spectra[key] = np.fft.rfft(h, nfft)
+        H.flags.writeable = False
+        if len(_spectra) > MAX_SPECTRA:
+            _spectra.popitem(last=False)
+    else:
+        _spectra.move_to_end(key)
+    return H
+
+
+def blockLength(m):
+    # Nutzlänge L eines Blocks, so dass L + m - 1 eine schnelle FFT-Länge ist
+    nfft = spectral.fastLength(BLOCK_FACTOR * m)
+    return nfft - m + 1, nfft
+
+
+def choose(n, m):
+    if m <= DIRECT_TAPS or n <= m:
+        return "direct"
+    if n <= 4 * blockLength(m)[0]:
+        return "fft"
+    return "ola"
+
+
+def fftFull(x, h, key=None):
+    n, m = x.shape[0], h.size
+    nfft = spectral.fastLength(n + m - 1)
+    X = np.fft.rfft(x, nfft, axis=0)
+    X *= spectral.column(kernelSpectrum(h, nfft, key), x.ndim)
+    return np.fft.irfft(X, nfft, axis=0)[:n + m - 1]
+
+
+def olaFull(x, h, key=None):
+    # Overlap-Add: alle Blöcke eines Batches mit einer 2-D-FFT falten
+    n, m = x.shape[0], h.size
+    L, nfft = blockLength(m)
+    H = kernelSpectrum(h, nfft, key).reshape((1, -1) + (1,) * (x.ndim - 1))
+    nblocks = -(-n // L)
+    dtype = np.result_type(x.dtype, h.dtype)
+    out = np.zeros((nblocks * L + L,) + x.shape[1:], dtype)
+    for b0 in range(0, nblocks, MAX_BLOCKS):
+        b1 = min(nblocks, b0 + MAX_BLOCKS)
+        seg = np.zeros(((b1 - b0) * L,) + x.shape[1:], dtype)
+        part = x[b0 * L:b1 * L]
+        seg[:part.shape[0]] = part
+        blocks = seg.reshape((b1 - b0, L) + x.shape[1:])
+        Y = np.fft.rfft(blocks, nfft, axis=1)
+        Y *= H
+        y = np.fft.irfft(Y, nfft, axis=1)
+        # Blockanfang auf den eigenen Bereich, Nachlauf (m-1 < L) auf den Folgeblock
+        out[b0 * L:b1 * L].reshape(blocks.shape)[:] += y[:, :L]
+        out[(b0 + 1) * L:(b1 + 1) * L].reshape(blocks.shape)[:, :m - 1] += y[:, L:L + m - 1]
+    return out[:n + m - 1]
+
+
+def directFull(x, h):
+    if x.ndim == 1:
+        return np.convolve(x, h, mode='full')
+    out = np.empty((x.shape[0] + h.size - 1,) + x.shape[1:], np.result_type(x.dtype, h.dtype))
+    for j in np.ndindex(x.shape[1:]):
+        out[(slice(None),) + j] = np.convolve(x[(slice(None),) + j], h, mode='full')
+    return out
+
+
+def convolve(x, h, mode='same', method='auto', key=None):
+    # Faltung entlang Achse 0; key identifiziert den Kernel im Spektren-Cache
+    x = np.asarray(x)
+    h = np.asarray(h)
+    if x.dtype == np.float32 and h.dtype != np.float32:
+        # float32-Modus: Kernel und Kernel-Spektrum ebenfalls einfach genau
+        h = h.astype(np.float32)
+        key = None if key is None else (key, "float32")
+    n, m = x.shape[0], h.size
+    if method == 'auto':
+        method = choose(n, m)
+    if method == 'direct':
+        full = directFull(x, h)
+    elif method == 'fft':
+        full = fftFull(x, h, key)
+    elif method == 'ola':
+        full = olaFull(x, h, key)
+    else:
+        raise ValueError("Unbekannte Methode: " + str(method))
+    if mode == 'full':
+        return full
+    if mode == 'same':
+        start = (min(n, m) - 1) // 2
+        return full[start:start + max(n, m)]
+    raise ValueError("Unbekannter Modus: " + str(mode))
+
+
+class FirStream:
+    # Blockweise Filterung mit Zustand (Overlap-Add-Nachlauf). Aneinander-
+    # gehängt ergeben die Ausgaben von process() und flush() genau
+    # convolve(x, h, mode='same') des ganzen Signals.
+    def __init__(self, h, key=None):
+        self.h = np.asarray(h)
+        self.key = key
+        self.tail = None
+        self.skip = (self.h.size - 1) // 2
+
+    def process(self, block):
+        block = np.asarray(block)
+        m = self.h.size
+        if block.shape[0] == 0:
+            return block
+        if m <= DIRECT_TAPS:
+            y = directFull(block, self.h)
+        else:
+            y = fftFull(block, self.h, self.key)
+        if self.tail is None:
+            self.tail = np.zeros((m - 1,) + block.shape[1:])
+        y[:m - 1] += self.tail
+        self.tail = y[block.shape[0]:].copy()
+        out = y[:block.shape[0]]
+        if self.skip:
+            # Gruppenlaufzeit von 'same' am Anfang abziehen
+            drop = min(self.skip, out.shape[0])
+            out = out[drop:]
+            self.skip -= drop
+        return out
+
+    def flush(self):
+        # Letzte Samples, damit die Gesamtlänge der Eingangslänge entspricht
+        if self.tail is None:
+            return np.zeros(0)
+        d = (self.h.size - 1) // 2 - self.skip
+        out = self.tail[self.skip:self.skip + d]
+        self.tail = None
+        return out
@@ -0,0 +1,388 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import soundfile as sf
+
+import audio_cache
+import fir
+import hilbert
+import playback
+import spectral
+import timing
+
+# Operator-Graph für die Skripte: Knoten für Laden, Mischer, FIR-Filter,
+# Spektralverschiebung (FFT bzw. Hilbert), Normierung und Spektrum, Senken für
+# Plot, Wiedergabe und Datei. Ein Skript baut den Graphen bei jedem Aufruf neu
+# auf und übergibt die Senken an execute(). Der Schlüssel eines Knotens
+# besteht aus seinen Parametern und denen aller Vorgänger (beim Laden: Pfad,
+# mtime, Kanal, Rate).
+# - Liest ein Knoten mit Parametern (z. B. das Filter mit P in algo2) die
+#   Ausgabe eines anderen oder lesen sie mehrere Knoten, wird sie prozessweit
+#   gespeichert. Ändert sich nur ein Slider weiter unten, wird erst ab dort
+#   neu gerechnet.
+# - Aufeinanderfolgende elementweise Knoten (Mischer) laufen in einem
+#   Durchgang in Abschnitten, ohne Oszillator oder Zwischenergebnis in voller
+#   Länge. Die Normierung rechnet im Puffer ihres Vorgängers, wenn ihn sonst
+#   niemand braucht.
+
+MAX_BYTES = 256 * 1024 * 1024
+
+
+class Signal:
+    # Ausgabe eines Knotens: Samples entlang Achse 0, Rate, x-Achse (Zeit bzw.
+    # Frequenz) und Länge nt des zugehörigen Zeitsignals. shared: Daten gehören
+    # audio_cache, werden also weder gespeichert noch überschrieben.
+    def __init__(self, data, fs, axis=None, nt=None, entry=None, shared=False):
+        self.data = data
+        self.fs = fs
+        self.axis = axis
+        self.nt = data.shape[0] if nt is None else nt
+        self.entry = entry
+        self.shared = shared or entry is not None
+
+
+class Node:
+    fused = False       # elementweise, wird mit Nachfolgern verschmolzen (apply statt compute)
+    inplace = False     # darf in den Puffer des Vorgängers schreiben (compute mit out=)
+    stage = "graph"
+
+    def __init__(self, *inputs):
+        self.inputs = inputs
+        self._key = None
+
+    def params(self):
+        return ()
+
+    def memoizable(self):
+        # Eingänge lohnen sich zu speichern, wenn der Knoten echte Parameter hat:
+        # ändert sich nur ein Parameter, wird aus dem gespeicherten Eingang gerechnet.
+        # Normalize() ohne festes peak hat keine, sein Eingang bleibt Arbeitspuffer.
+        return any(p is not None for p in self.params())
+
+    def key(self):
+        if self._key is None:
+            self._key = (type(self).__name__, self.params()) + tuple(node.key() for node in self.inputs)
+        return self._key
+
+
+class Load(Node):
+    # Audiodatei aus audio_cache, Kanal und Rate wie in der GUI eingestellt
+    stage = "load"
+
+    def __init__(self, fileName, channel=None, rate=None):
+        Node.__init__(self)
+        self.fileName = fileName
+        self.channel = audio_cache.CHANNEL if channel is None else channel
+        self.rate = audio_cache.RATE if rate is None else rate
+        self.entry = None
+
+    def params(self):
+        return audio_cache.CACHE.key(self.fileName, self.channel, self.rate)
+
+    @property
+    def audio(self):
+        if self.entry is None:
+            self.entry = audio_cache.CACHE.load(self.fileName, self.channel, self.rate)
+        return self.entry
+
+    def compute(self):
+        audio = self.audio
+        return Signal(audio.data, audio.fs, audio.t, entry=audio)
+
+
+class Mix(Node):
+    # Multiplikation mit cos(2π freq n / fs), alle Kanäle auf einmal
+    fused = True
+    stage = "dsp"
+
+    def __init__(self, source, freq):
+        Node.__init__(self, source)
+        self.freq = freq
+
+    def params(self):
+        return (self.freq,)
+
+    def apply(self, block, start, fs, out):
+        osc = np.cos(spectral.phase(start, start + block.shape[0], self.freq / fs))
+        np.multiply(block, spectral.column(osc, block.ndim), out=out, casting="same_kind")
+
+
+class Fir(Node):
+    # Faltung wie np.convolve(x, h, mode='same'); key benennt den Kernel für
+    # den Spektren-Cache in fir und für den Knotenschlüssel
+    stage = "fir"
+
+    def __init__(self, source, h, key=None):
+        Node.__init__(self, source)
+        self.h = h
+        self.kernel = key
+
+    def params(self):
+        return (self.h.tobytes() if self.kernel is None else self.kernel,)
+
+    def compute(self, signal):
+        return Signal(fir.convolve(signal.data, self.h, mode='same', key=self.kernel), signal.fs, signal.axis)
+
+
+class Normalize(Node):
+    # Auf Betragsmaximum 1 (bzw. festes peak) skalieren
+    inplace = True
+    stage = "dsp"
+
+    def __init__(self, source, peak=None):
+        Node.__init__(self, source)
+        self.peak = peak
+
+    def params(self):
+        return (self.peak,)
+
+    def compute(self, signal, out=None):
+        data = signal.data
+        peak = self.peak or max(data.max(), -data.min())
+        if out is None:
+            out = np.empty(data.shape, np.result_type(data.dtype, spectral.dtypes()[0]))
+        np.divide(data, peak if peak > 0 else 1, out=out, casting="same_kind")
+        return Signal(out, signal.fs, signal.axis)
+
+
+class Rfft(Node):
+    # Halbspektrum auf schnelle Länge aufgefüllt (beim geladenen Signal aus audio_cache)
+    stage = "fft"
+
+    def compute(self, signal):
+        if signal.entry is not None:
+            return Signal(signal.entry.rfft, signal.fs, signal.axis, signal.nt, shared=True)
+        return Signal(spectral.rfft(signal.data, spectral.fastLength(signal.nt)), signal.fs, signal.axis, signal.nt)
+
+
+class Shift(Node):
+    # Spektrum um bins nach oben schieben wie algo4; das Halbspektrum der
+    # Quelle wird gespeichert, ein neuer Shift rechnet nur shiftBins und irfft
+    stage = "fft"
+
+    def __init__(self, source, bins):
+        Node.__init__(self, Rfft(source))
+        self.bins = bins
+
+    def params(self):
+        return (self.bins,)
+
+    def compute(self, spectrum):
+        nfft = spectral.fastLength(spectrum.nt)
+        shifted = spectral.shiftBins(spectrum.data, self.bins)
+        return Signal(spectral.irfft(shifted, nfft)[:spectrum.nt], spectrum.fs, spectrum.axis)
+
+
+class Hilbert(Node):
+    # Hilbert-Transformierte H(x), hängt nicht von der Verschiebung ab
+    stage = "fir"
+
+    def __init__(self, source, taps=hilbert.TAPS):
+        Node.__init__(self, source)
+        self.taps = taps
+
+    def params(self):
+        return (self.taps,)
+
+    def compute(self, signal):
+        return Signal(hilbert.transform(signal.data, self.taps), signal.fs, signal.axis)
+
+
+class Ssb(Node):
+    # Einseitenband-Verschiebung um freq Hz; H(x) bleibt gespeichert, ein
+    # neues freq kostet nur die Multiplikation mit dem Oszillator
+    stage = "dsp"
+
+    def __init__(self, source, freq, taps=hilbert.TAPS):
+        Node.__init__(self, source, Hilbert(source, taps))
+        self.freq = freq
+
+    def params(self):
+        return (self.freq,)
+
+    def compute(self, signal, transformed):
+        return Signal(hilbert.mix(signal.data, transformed.data, 0, signal.fs, self.freq), signal.fs, signal.axis)
+
+
+class Spectrum(Node):
+    # Betragsspektrum wie spectral.magnitude, x-Achse in Hz
+    stage = "fft"
+
+    def compute(self, signal):
+        nfft = spectral.fastLength(signal.nt)
+        f = spectral.frequencies(nfft, signal.fs)
+        if signal.entry is not None:
+            return Signal(signal.entry.spectrum, signal.fs, f, signal.nt, shared=True)
+        return Signal(spectral.magnitude(signal.data, signal.nt, nfft), signal.fs, f, signal.nt)
+
+
+class Sink:
+    def __init__(self, source):
+        self.inputs = (source,)
+
+    def params(self):
+        return ()
+
+    def memoizable(self):
+        return False
+
+
+class Plot(Sink):
+    # Linie index des redraw-Plotters
+    def __init__(self, plotter, index, source, **kwargs):
+        Sink.__init__(self, source)
+        self.plotter = plotter
+        self.index = index
+        self.kwargs = kwargs
+
+    def write(self, signal):
+        self.plotter.plot(self.index, signal.axis, signal.data, **self.kwargs)
+
+
+class Play(Sink):
+    # Wiedergabe über den Player der GUI (saveValue) bzw. eigenen Prozess
+    def __init__(self, source, player=None):
+        Sink.__init__(self, source)
+        self.player = player
+
+    def write(self, signal):
+        playback.play(signal.data, signal.fs, self.player)
+
+
+class File(Sink):
+    def __init__(self, source, fileName):
+        Sink.__init__(self, source)
+        self.fileName = fileName
+
+    def write(self, signal):
+        with timing.stage("write"):
+            sf.write(self.fileName, signal.data, signal.fs)
+
+
+class Plan:
+    # Zustand eines Durchlaufs: Verbraucher je Knoten, zu speichernde Knoten
+    # und Ergebnisse, die mehrere Verbraucher lesen
+    def __init__(self, sinks):
+        self.consumers = {}
+        self.keep = set()
+        self.values = {}
+        for sink in sinks:
+            self.visit(sink)
+        # An Verzweigungen kann sich ein Zweig ändern, während der andere gleich bleibt
+        self.keep.update(key for key, count in self.consumers.items() if count > 1)
+
+    def visit(self, node):
+        for source in node.inputs:
+            key = source.key()
+            self.consumers[key] = self.consumers.get(key, 0) + 1
+            if node.memoizable():
+                self.keep.add(key)
+            if self.consumers[key] == 1:
+                self.visit(source)
+
+    def single(self, key):
+        return self.consumers.get(key, 0) == 1 and key not in self.keep
+
+
+class Graph:
+    def __init__(self, maxBytes=MAX_BYTES):
+        self.maxBytes = maxBytes
+        self.memo = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def execute(self, sinks):
+        # Senken in der angegebenen Reihenfolge bedienen, liefert ihre Eingangssignale
+        plan = Plan(sinks)
+        signals = []
+        for sink in sinks:
+            signal, _ = self.evaluate(sink.inputs[0], plan)
+            sink.write(signal)
+            signals.append(signal)
+        return signals
+
+    def evaluate(self, node, plan):
+        # (Signal, owned): owned heißt, der einzige Verbraucher darf den Puffer überschreiben
+        key = node.key()
+        if key in plan.values:
+            return plan.values[key], False
+        signal = self.lookup(key)
+        fresh = signal is None
+        if fresh:
+            signal = self.fuse(node, plan) if node.fused else self.compute(node, plan)
+            if key in plan.keep and not signal.shared:
+                self.store(key, signal)
+        if plan.consumers.get(key, 0) > 1:
+            plan.values[key] = signal
+        return signal, fresh and not signal.shared and plan.single(key)
+
+    def compute(self, node, plan):
+        inputs = [self.evaluate(source, plan) for source in node.inputs]
+        with timing.stage(node.stage):
+            if node.inplace and inputs[0][1]:
+                return node.compute(inputs[0][0], out=inputs[0][0].data)
+            return node.compute(*[signal for signal, _ in inputs])
+
+    def fuse(self, node, plan):
+        # Kette elementweiser Knoten, deren Zwischenergebnisse niemand sonst
+        # liest, abschnittsweise in einem Durchgang in einen Ausgabepuffer
+        ops = [node]
+        source = node.inputs[0]
+        while source.fused and plan.single(source.key()):
+            ops.append(source)
+            source = source.inputs[0]
+        ops.reverse()
+        signal, owned = self.evaluate(source, plan)
+        data = signal.data
+        dtype = np.result_type(data.dtype, spectral.dtypes()[0])
+        out = data if owned and data.dtype == dtype else np.empty(data.shape, dtype)
+        with timing.stage(node.stage):
+            for i in range(0, data.shape[0], spectral.CHUNK):
+                block = data[i:i + spectral.CHUNK]
+                for op in ops:
+                    op.apply(block, i, signal.fs, out[i:i + spectral.CHUNK])
+                    block = out[i:i + spectral.CHUNK]
+        return Signal(out, signal.fs, signal.axis, signal.nt)
+
+    def lookup(self, key):
+        with self.lock:
+            signal = self.memo.get(key)
+            if signal is None:
+                self.misses += 1
+                return None
+            self.memo.move_to_end(key)
+            self.hits += 1
+            return signal
+
+    def store(self, key, signal):
+        size = signal.data.nbytes
+        if size > self.maxBytes:
+            return
+        signal.data.flags.writeable = False
+        with self.lock:
+            if key in self.memo:
+                return
+            self.memo[key] = signal
+            self.bytes += size
+            while self.bytes > self.maxBytes:
+                _, old = self.memo.popitem(last=False)
+                self.bytes -= old.data.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.memo.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.memo), "bytes": self.bytes}
+
+
+GRAPH = Graph()
+
+
+def execute(sinks):
+    return GRAPH.execute(sinks)
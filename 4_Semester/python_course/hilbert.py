@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+import numpy as np
+
+import fir
+import spectral
+
+# Frequenzverschiebung um einen festen Betrag in Hz (Einseitenband): aus dem
+# Signal x und seiner Hilbert-Transformierten H(x) (FIR, gleiche Länge, ohne
+# Verzögerung wie np.convolve mode='same') ergibt sich
+#   y = Re{(x + j H(x)) e^(j 2π f n / fs)} = x cos(2π f n / fs) - H(x) sin(2π f n / fs).
+# Anders als die FFT-Verschiebung in algo4 geht das blockweise mit Zustand, und
+# H(x) hängt nicht von f ab: beim Verschieben des Sliders bleibt nur die
+# Multiplikation mit dem Oszillator. Unterhalb von etwa fs / TAPS und nahe
+# fs/2 ist der Hilbert-Transformator ungenau (Übergangsbereich des Filters).
+
+TAPS = 511      # ungerade, Gruppenlaufzeit wird wie bei mode='same' ausgeglichen
+BETA = 8.0      # Kaiser-Fenster
+
+
+@lru_cache(maxsize=16)
+def design(taps=TAPS, beta=BETA):
+    # Idealer Hilbert-Transformator h[n] = 2 / (π n) für ungerade n, sonst 0
+    n = np.arange(taps) - taps // 2
+    h = np.zeros(taps)
+    odd = n % 2 != 0
+    h[odd] = 2 / (np.pi * n[odd])
+    h *= np.kaiser(taps, beta)
+    h.flags.writeable = False
+    return h
+
+
+def transform(x, taps=TAPS):
+    # H(x) des ganzen Signals entlang Achse 0
+    return fir.convolve(x, design(taps), mode='same', key=("hilbert", taps))
+
+
+@lru_cache(maxsize=8)
+def _table(step):
+    # cos und sin für einen Abschnitt ab Phase 0
+    p = spectral.phase(0, spectral.CHUNK, step)
+    c, s = np.cos(p), np.sin(p)
+    c.flags.writeable = s.flags.writeable = False
+    return c, s
+
+
+def mix(x, hx, start, fs, freq, out=None):
+    # x cos - H(x) sin für die Samples start ... start + len(x) - 1. Der
+    # Oszillator entsteht je Abschnitt durch Drehen einer Tabelle um die
+    # Startphase (ein cos/sin pro Abschnitt statt pro Sample)
+    step = freq / fs
+    tc, ts = _table(step)
+    if out is None:
+        out = np.empty(x.shape, np.result_type(x.dtype, hx.dtype))
+    for i in range(0, x.shape[0], spectral.CHUNK):
+        n = min(spectral.CHUNK, x.shape[0] - i)
+        r = spectral.phase(start + i, start + i + 1, step)[0]
+        c = tc[:n] * np.cos(r) - ts[:n] * np.sin(r)
+        s = ts[:n] * np.cos(r) + tc[:n] * np.sin(r)
+        o = out[i:i + n]
+        np.multiply(x[i:i + n], spectral.column(c, x.ndim), out=o, casting="same_kind")
+        o -= hx[i:i + n] * spectral.column(s, x.ndim)
+    return out
+
+
+def shift(x, fs, freq, hx=None, taps=TAPS):
+    # Ganzes Signal um freq Hz verschieben (negativ: nach unten); ein bereits
+    # berechnetes H(x) kann übergeben werden
+    x = np.asarray(x)
+    if hx is None:
+        hx = transform(x, taps)
+    return mix(x, hx, 0, fs, freq)
+
+
+class Shifter:
+    # Blockweise mit Zustand: H(x) kommt aus einem FirStream und läuft dem
+    # Eingang um die halbe Filterlänge hinterher, die Eingangssamples warten
+    # so lange. Aneinandergehängt ergeben process() und flush() shift().
+    def __init__(self, fs, freq, taps=TAPS):
+        self.fs = fs
+        self.freq = freq
+        self.filter = fir.FirStream(design(taps), key=("hilbert", taps))
+        self.pending = None
+        self.n = 0
+
+    def process(self, block):
+        block = np.asarray(block)
+        pending = block if self.pending is None else np.concatenate((self.pending, block))
+        return self.emit(pending, self.filter.process(block))
+
+    def flush(self):
+        if self.pending is None:
+            return np.zeros(0)
+        return self.emit(self.pending, self.filter.flush())
+
+    def emit(self, pending, hx):
+        k = hx.shape[0]
+        out = mix(pending[:k], hx, self.n, self.fs, self.freq)
+        self.pending = pending[k:]
+        self.n += k
+        return out
@@ -0,0 +1,87 @@
+import copy
+
+import numpy as np
+
+# Min/Max-Hüllkurven-Pyramide für lange, gleichmäßig abgetastete Signale.
+# Stufe k fasst Blöcke von minBlock * 2**k Samples zu (min, max) zusammen.
+# Eine Abfrage liefert für einen x-Bereich höchstens ~2 Punkte pro Pixel,
+# der Zeichenaufwand hängt damit nur von der Breite der Achse ab.
+# Mehrkanalige Signale (frames x Kanäle) werden in einem Durchgang verdichtet.
+
+
+def _halve(a, func):
+    k = a.shape[0] // 2 * 2
+    out = func(a[0:k:2], a[1:k:2])
+    if a.shape[0] % 2:
+        out = np.concatenate((out, a[-1:]))
+    return out
+
+
+def uniform(x, y):
+    # Nur für gleichmäßige x-Achsen (np.arange/np.linspace) geeignet
+    n = y.shape[0]
+    if x.shape != y.shape[:1] or n < 3:
+        return False
+    dx = (x[-1] - x[0]) / (n - 1)
+    return dx > 0 and abs(x[n // 2] - x[0] - dx * (n // 2)) <= 1e-6 * abs(x[-1] - x[0])
+
+
+class Envelope:
+    def __init__(self, x, y, minBlock=4):
+        n = y.shape[0]
+        self.y = y
+        self.n = n
+        self.x0 = x[0]
+        self.dx = (x[-1] - x[0]) / (n - 1)
+
+        m = n // minBlock * minBlock
+        blocks = y[:m].reshape((-1, minBlock) + y.shape[1:])
+        mins = blocks.min(axis=1)
+        maxs = blocks.max(axis=1)
+        if m < n:
+            mins = np.concatenate((mins, y[m:].min(axis=0, keepdims=True)))
+            maxs = np.concatenate((maxs, y[m:].max(axis=0, keepdims=True)))
+
+        self.levels = [(minBlock, mins, maxs)]
+        block = minBlock
+        while mins.shape[0] > 1:
+            mins = _halve(mins, np.minimum)
+            maxs = _halve(maxs, np.maximum)
+            block *= 2
+            self.levels.append((block, mins, maxs))
+
+        self.ymin = mins[0].min()
+        self.ymax = maxs[0].max()
+        self.xmin = x[0]
+        self.xmax = x[-1]
+
+    def coarse(self, blocks):
+        # Kopie nur mit den Stufen aus höchstens blocks Blöcken und ohne
+        # Rohdaten (z. B. zum Verschicken an einen anderen Prozess); Abfragen
+        # bis etwa blocks Pixel Breite liefern dasselbe wie das Original
+        env = copy.copy(self)
+        env.levels = [level for level in self.levels if level[1].shape[0] <= blocks] or self.levels[-1:]
+        env.y = self.y[:0]
+        return env
+
+    def query(self, lo, hi, pixels):
+        pixels = max(1, int(pixels))
+        i0 = max(0, int(np.floor((lo - self.x0) / self.dx)) - 1)
+        i1 = min(self.n, int(np.ceil((hi - self.x0) / self.dx)) + 2)
+        if i1 <= i0:
+            return np.empty(0), np.empty(0)
+        count = i1 - i0
+        if count <= 2 * pixels:
+            return self.x0 + np.arange(i0, i1) * self.dx, self.y[i0:i1]
+
+        for block, mins, maxs in self.levels:
+            if count <= block * pixels:
+                break
+        b0 = i0 // block
+        b1 = -(-i1 // block)
+        centers = self.x0 + (np.arange(b0, b1) * block + (block - 1) / 2) * self.dx
+        xs = np.repeat(centers, 2)
+        ys = np.empty((xs.size,) + self.y.shape[1:], dtype=self.y.dtype)
+        ys[0::2] = mins[b0:b1]
+        ys[1::2] = maxs[b0:b1]
+        return xs, ys
@@ -0,0 +1,299 @@
+import multiprocessing as multiproc
+import threading
+import time
+
+import numpy as np
+
+import resample
+import timing
+
+# Langlebiger Wiedergabe-Prozess. Die Samples werden als float32 über einen
+# Ringpuffer im Shared Memory übergeben, das Array wird nie gepickelt.
+# Ein neuer Puffer ersetzt den laufenden mit einem kurzen Crossfade.
+
+CAPACITY = 1 << 18   # Samples im Ringpuffer
+CHUNK = 1024         # Samples pro Schreibvorgang auf das Audiogerät
+FADE = 512           # Länge des Crossfades in Samples
+
+
+class NullBackend:
+    # Verwirft die Samples, hält aber das Echtzeit-Tempo ein (Test ohne Audiohardware)
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self.fs = None
+
+    def open(self, fs):
+        self.fs = fs
+
+    def write(self, block):
+        if self.realtime:
+            time.sleep(block.size / self.fs)
+
+    def close(self):
+        pass
+
+
+class PyAudioBackend:
+    def __init__(self):
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.pa = pyaudio.PyAudio()
+        self.stream = None
+        self.fs = None
+        self.resampler = None
+
+    def supported(self, fs):
+        try:
+            device = self.pa.get_default_output_device_info()["index"]
+            return self.pa.is_format_supported(fs, output_device=device, output_channels=1,
+                                               output_format=self.pyaudio.paFloat32)
+        except (ValueError, IOError):
+            return False
+
+    def open(self, fs):
+        if self.stream is not None and fs == self.fs:
+            return
+        self.close()
+        # Raten, die das Gerät nicht kann (z. B. eine niedrige Analyse-Rate),
+        # blockweise auf die Standardrate des Geräts umrechnen
+        rate = fs
+        if not self.supported(fs):
+            rate = int(self.pa.get_default_output_device_info()["defaultSampleRate"])
+        self.resampler = resample.Resampler(fs, rate) if rate != fs else None
+        self.stream = self.pa.open(format=self.pyaudio.paFloat32, channels=1, rate=rate, output=True)
+        self.fs = fs
+
+    def write(self, block):
+        if self.resampler is not None:
+            block = self.resampler.process(block).astype(np.float32)
+        self.stream.write(view(block), block.size)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+
+BACKENDS = {"pyaudio": PyAudioBackend, "null": NullBackend}
+
+
+class Ring:
+    # Gemeinsamer Zustand von GUI- und Wiedergabe-Prozess. Die Zähler laufen
+    # monoton hoch, die Position im Puffer ist Zähler % capacity.
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.buf = multiproc.RawArray('f', capacity)
+        self.write = multiproc.RawValue('q', 0)
+        self.read = multiproc.RawValue('q', 0)
+        self.start = multiproc.RawValue('q', 0)
+        self.gen = multiproc.RawValue('q', 0)
+        self.fs = multiproc.RawValue('q', 0)
+        self.lock = multiproc.Lock()
+        self.ready = multiproc.Event()
+        self.quit = multiproc.Event()
+
+    def array(self):
+        return np.frombuffer(self.buf, dtype=np.float32)
+
+    def take(self, samples, pos, n):
+        i = pos % self.capacity
+        if i + n <= self.capacity:
+            return samples[i:i + n].copy()
+        return np.concatenate((samples[i:], samples[:i + n - self.capacity]))
+
+    def put(self, samples, pos, block):
+        i = pos % self.capacity
+        n = min(block.size, self.capacity - i)
+        samples[i:i + n] = block[:n]
+        samples[:block.size - n] = block[n:]
+
+
+class Crossfade:
+    # Überblendung beim Wechsel des Signals: die noch fälligen Samples des alten
+    # Signals werden auf 0 aus-, das neue gleich lang von 0 eingeblendet (Summe
+    # der Gewichte 1). Sind die Blöcke kürzer als die Überblendung, läuft sie
+    # über mehrere Blöcke weiter.
+    def __init__(self):
+        self.tail = None    # ausgeblendeter Rest des alten Signals
+        self.gains = None   # noch ausstehende Einblend-Faktoren des neuen
+
+    def pending(self):
+        return 0 if self.tail is None else self.tail.size
+
+    def begin(self, old):
+        # old: die als nächstes fälligen Samples des alten Signals; eine noch
+        # laufende Überblendung steckt darin und wird mit ausgeblendet
+        fade = min(FADE, max(old.size, self.pending()))
+        upcoming = np.zeros(fade, np.float32)
+        upcoming[:old.size] = old[:fade]
+        upcoming = self.apply(upcoming)
+        if fade == 0:
+            self.reset()
+            return
+        out = np.linspace(1, 0, fade + 1, dtype=np.float32)[1:]
+        self.tail = upcoming * out
+        self.gains = 1 - out
+
+    def reset(self):
+        self.tail = self.gains = None
+
+    def apply(self, block):
+        if self.gains is not None:
+            k = min(block.size, self.gains.size)
+            block[:k] *= self.gains[:k]
+            self.gains = self.gains[k:] if k < self.gains.size else None
+        if self.tail is not None:
+            k = min(block.size, self.tail.size)
+            block[:k] += self.tail[:k]
+            self.tail = self.tail[k:] if k < self.tail.size else None
+        return block
+
+
+def worker(ring, backendName):
+    backend = BACKENDS[backendName]()
+    samples = ring.array()
+    fader = Crossfade()
+    gen = 0
+    read = 0
+    while not ring.quit.is_set():
+        with ring.lock:
+            newGen, start, fs = ring.gen.value, ring.start.value, ring.fs.value
+        if newGen != gen:
+            # Noch nicht gespielte alte Samples für den Crossfade ausblenden
+            if gen and fs == backend.fs:
+                fader.begin(ring.take(samples, read, max(0, min(FADE, start - read))))
+            else:
+                fader.reset()
+            gen = newGen
+            read = start
+            with ring.lock:
+                ring.read.value = read
+
+        avail = ring.write.value - read
+        if avail <= 0:
+            ring.ready.wait(0.05)
+            ring.ready.clear()
+            continue
+
+        n = min(CHUNK, avail)
+        block = fader.apply(ring.take(samples, read, n))
+
+        backend.open(fs)
+        backend.write(block)
+        read += n
+        with ring.lock:
+            if ring.gen.value == gen:
+                ring.read.value = read
+    backend.close()
+
+
+class PlaybackService:
+    def __init__(self, backend="pyaudio", capacity=CAPACITY):
+        self.ring = Ring(capacity)
+        self.cond = threading.Condition()
+        self.source = None
+        self.block = None
+        self.offset = 0
+        self.closed = False
+        self.process = multiproc.Process(target=worker, args=(self.ring, backend), daemon=True)
+        self.process.start()
+        self.feeder = threading.Thread(target=self.feed, daemon=True)
+        self.feeder.start()
+
+    def play(self, data, fs):
+        data = np.asarray(data)
+        if data.ndim > 1:
+            # Ausgabe ist mono: mehrkanalige Ergebnisse heruntermischen
+            data = data.mean(axis=1)
+        with timing.stage("audio"):
+            self.stream([data], fs)
+
+    def stream(self, blocks, fs):
+        # blocks: beliebiger Iterator über 1-D-Arrays, wird nach und nach eingespeist
+        with self.cond:
+            with self.ring.lock:
+                self.ring.gen.value += 1
+                self.ring.start.value = self.ring.write.value
+                self.ring.fs.value = int(fs)
+            self.source = iter(blocks)
+            self.block = None
+            self.offset = 0
+            self.cond.notify()
+        self.ring.ready.set()
+
+    def busy(self):
+        with self.cond:
+            pending = self.source is not None
+        return pending or self.ring.write.value > self.ring.read.value
+
+    def feed(self):
+        samples = self.ring.array()
+        capacity = self.ring.capacity
+        while True:
+            with self.cond:
+                while self.source is None and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                source = self.source
+                needBlock = self.block is None or self.offset >= self.block.size
+
+            if needBlock:
+                # Nächsten Block außerhalb des Locks holen (kann dekodieren)
+                block = next(source, None)
+                with self.cond:
+                    if self.source is not source:
+                        continue
+                    if block is None:
+                        self.source = None
+                        continue
+                    self.block = np.asarray(block).reshape(-1)
+                    self.offset = 0
+
+            with self.cond:
+                if self.source is not source:
+                    continue
+                free = capacity - (self.ring.write.value - self.ring.read.value)
+                if free <= 0:
+                    self.cond.wait(0.01)
+                    continue
+                n = min(free, self.block.size - self.offset, 16 * CHUNK)
+                write = self.ring.write.value
+                # Umwandlung nach float32 nur abschnittsweise beim Kopieren
+                self.ring.put(samples, write, self.block[self.offset:self.offset + n])
+                self.offset += n
+                with self.ring.lock:
+                    self.ring.write.value = write + n
+            self.ring.ready.set()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.ring.quit.set()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def view(block):
+    # Nur lesbare Byte-Sicht auf die Samples statt einer Kopie per tobytes()
+    return memoryview(np.ascontiguousarray(block, dtype=np.float32)).cast("B").toreadonly()
+
+
+def playAudio(dat, samplerate):
+    import pyaudio
+    stream = pyaudio.PyAudio().open(format=pyaudio.paFloat32, channels=1, rate=samplerate, output=True)
+    dat = np.asarray(dat)
+    stream.write(view(dat if dat.ndim == 1 else dat.mean(axis=1)), dat.shape[0])
+    stream.close()
+
+
+def play(data, fs, player=None):
+    # Mit Wiedergabedienst (aus der GUI) abspielen, sonst wie bisher in eigenem Prozess
+    if player is not None and hasattr(player, "play"):
+        player.play(data, fs)
+    else:
+        with timing.stage("spawn"):
+            multiproc.Process(target=playAudio, args=(data, fs)).start()
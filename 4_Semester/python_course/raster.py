@@ -0,0 +1,119 @@
+import multiprocessing as multiproc
+import queue
+import time
+
+import numpy as np
+
+# Rastern der Figure in einem eigenen Prozess: die GUI schickt die
+# aufgezeichneten redraw-Befehle eines Skripts (lange Linien nur als grobe
+# Min/Max-Hüllkurve) an den Raster-Prozess. Dieser spielt sie auf einer
+# eigenen Agg-Figure ab, rastert nur den jeweils neuesten Stand und legt das
+# RGBA-Bild in einen Shared-Memory-Puffer. Layout und Rastern laufen so
+# parallel zur nächsten Berechnung und blockieren die Eingabe nicht.
+
+MAX_PIXELS = 3840 * 2160   # Bildgröße, für die der Puffer angelegt wird
+LINE_BLOCKS = 4096         # feinste Hüllkurven-Stufe, die verschickt wird (~ Pixel pro Achse)
+
+
+class Frame:
+    # Gemeinsamer Bildpuffer; frame zählt die fertigen Bilder, start/end sind
+    # perf_counter_ns des Rasterns (auf Linux prozessübergreifend vergleichbar)
+    def __init__(self, capacity=MAX_PIXELS):
+        self.capacity = capacity
+        self.buf = multiproc.RawArray('B', 4 * capacity)
+        self.frame = multiproc.RawValue('q', 0)
+        self.width = multiproc.RawValue('q', 0)
+        self.height = multiproc.RawValue('q', 0)
+        self.start = multiproc.RawValue('q', 0)
+        self.end = multiproc.RawValue('q', 0)
+        self.lock = multiproc.Lock()
+
+    def array(self):
+        return np.frombuffer(self.buf, dtype=np.uint8)
+
+
+def prepare(ops, blocks=LINE_BLOCKS):
+    # Zeichenbefehle ohne draw(); Linien mit Hüllkurve nur mit deren groben
+    # Stufen statt der vollen Daten (kleiner beim Pickeln). Der Raster-Prozess
+    # fragt sie wie die Zeichenfläche passend zur Achsenbreite ab.
+    prepared = []
+    for name, args, kwargs in ops:
+        if name == "draw":
+            continue
+        if name == "drawLine" and args[3] is not None:
+            index, x, y, env, options = args
+            args = (index, x[:0], y[:0], env.coarse(blocks), options)
+        prepared.append((name, args, kwargs))
+    return prepared
+
+
+def worker(frame, requests, rc):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import redraw
+
+    matplotlib.rcParams.update(rc or {})
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
+    plotter = redraw.Plotter(fig)
+    pixels = frame.array()
+    size = None
+    while True:
+        request = requests.get()
+        # Alle wartenden Befehle abspielen, aber nur den neuesten Stand rastern
+        while request is not None:
+            ops, width, height, dpi = request
+            plotter.replay(ops)
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+        if request is None:
+            return
+        start = time.perf_counter_ns()
+        # Größe begrenzen, damit das Bild in den Puffer passt
+        scale = min(1.0, (frame.capacity / max(1, width * height)) ** 0.5)
+        width, height, dpi = int(width * scale), int(height * scale), dpi * scale
+        if (width, height, dpi) != size:
+            fig.set_dpi(dpi)
+            fig.set_size_inches(width / dpi, height / dpi)
+            size = (width, height, dpi)
+        plotter.draw()
+        rgba = np.asarray(canvas.buffer_rgba())
+        with frame.lock:
+            pixels[:rgba.size] = rgba.reshape(-1)
+            frame.width.value, frame.height.value = rgba.shape[1], rgba.shape[0]
+            frame.start.value, frame.end.value = start, time.perf_counter_ns()
+            frame.frame.value += 1
+
+
+class RasterService:
+    def __init__(self, rc=None, capacity=MAX_PIXELS):
+        self.frame = Frame(capacity)
+        self.requests = multiproc.Queue()
+        self.process = multiproc.Process(target=worker, args=(self.frame, self.requests, rc), daemon=True)
+        self.process.start()
+
+    def submit(self, ops, width, height, dpi):
+        # Befehle (auch leer, z. B. nach Größenänderung) rastern lassen
+        self.requests.put((prepare(ops), int(width), int(height), dpi))
+
+    def take(self, last):
+        # Neues Bild seit Nummer last als Kopie (Höhe x Breite x 4) oder None
+        with self.frame.lock:
+            number = self.frame.frame.value
+            if number == last:
+                return None
+            width, height = self.frame.width.value, self.frame.height.value
+            rgba = self.frame.array()[:4 * width * height].copy()
+            start, end = self.frame.start.value, self.frame.end.value
+        return number, rgba.reshape(height, width, 4), start, end
+
+    def close(self):
+        self.requests.put(None)
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
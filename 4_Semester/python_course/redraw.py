@@ -0,0 +1,242 @@
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+import lod
+import timing
+
+# Inkrementelles Neuzeichnen: Achsen und Line2D-Objekte bleiben zwischen zwei
+# Aufrufen erhalten, nur die Daten werden per set_data ersetzt. Mit blit=True
+# (in der GUI) wird der statische Hintergrund gepuffert und nur die Linien
+# und der Titel neu gezeichnet. Lange Signale werden über eine Min/Max-Pyramide
+# (lod.py) passend zur Pixelbreite ausgedünnt und bei Zoom/Pan neu abgefragt.
+# Im Aufzeichnungsmodus (Skript läuft in einem Hintergrund-Thread) werden die
+# Aufrufe nur gesammelt und später im GUI-Thread mit replay() ausgeführt;
+# jedes draw() reicht die bis dahin gesammelten Aufrufe an publish() weiter,
+# so dass Zwischenstände (z. B. beim Spektrogramm) schon sichtbar werden.
+
+# Ab dieser Zahl Samples pro Pixel wird die Hüllkurve statt der Rohdaten gezeichnet
+LOD_FACTOR = 4
+
+
+def get(fig):
+    # Plotter hängt an der Figure selbst (kein Modul-Verzeichnis, das die
+    # Figure über den Plotter am Leben hält): beide werden zusammen freigegeben
+    plotter = getattr(fig, "_plotter", None)
+    if plotter is None:
+        plotter = fig._plotter = Plotter(fig)
+    return plotter
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Plotter:
+    def __init__(self, fig):
+        self.fig = fig
+        self.blit = False
+        self.key = None
+        self.axes = []
+        self.lines = {}
+        self.images = {}
+        self.envelopes = {}
+        self.title = None
+        self.background = None
+        self.relayout = False
+        self.full = False
+        self.local = threading.local()
+        self.cid = fig.canvas.mpl_connect('draw_event', self.onDraw)
+
+    @contextmanager
+    def recording(self, stale=None, publish=None):
+        # Aufrufe dieses Threads sammeln statt zeichnen; stale() bricht veraltete Jobs ab
+        self.local.ops = []
+        self.local.stale = stale
+        self.local.publish = publish
+        self.local.sent = 0
+        try:
+            yield self.local.ops
+        finally:
+            self.local.ops = None
+
+    def record(self, name, *args, **kwargs):
+        ops = getattr(self.local, "ops", None)
+        if ops is None:
+            return False
+        if self.local.stale is not None and self.local.stale():
+            raise Cancelled()
+        ops.append((name, args, kwargs))
+        return True
+
+    def replay(self, ops):
+        for name, args, kwargs in ops:
+            getattr(self, name)(*args, **kwargs)
+
+    def valid(self):
+        # Ein Skript ohne Plotter kann die Figure inzwischen mit fig.clf() geleert haben
+        return self.key is not None and all(ax in self.fig.axes for ax in self.axes)
+
+    def layout(self, key, nrows, ncols, titles=(), tight=True):
+        if self.record("layout", key, nrows, ncols, titles, tight):
+            return None
+        if key == self.key and self.valid():
+            return self.axes
+        self.fig.clf()
+        self.axes = [self.fig.add_subplot(nrows, ncols, i + 1) for i in range(nrows * ncols)]
+        for ax, title in zip(self.axes, titles):
+            ax.set_title(title)
+        for index, ax in enumerate(self.axes):
+            ax.callbacks.connect('xlim_changed', lambda ax, index=index: self.refresh(index))
+        self.key = key
+        self.lines = {}
+        self.images = {}
+        self.envelopes = {}
+        self.title = None
+        self.background = None
+        self.relayout = tight
+        self.full = True
+        return self.axes
+
+    def suptitle(self, text, **kwargs):
+        if self.record("suptitle", text, **kwargs):
+            return
+        if self.title is None:
+            self.title = self.fig.suptitle(text, animated=self.blit, **kwargs)
+            self.full = True
+        else:
+            self.title.set_text(text)
+
+    def plot(self, index, x, y, **kwargs):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if getattr(self.local, "ops", None) is not None:
+            # Hüllkurve schon im Hintergrund-Thread berechnen
+            env = self.envelope(index, self.fig.bbox.width, x, y)
+            self.record("drawLine", index, x, y, env, kwargs)
+        else:
+            ax = self.axes[index]
+            self.drawLine(index, x, y, self.envelope(index, ax.bbox.width, x, y), kwargs)
+
+    def drawLine(self, index, x, y, env, kwargs):
+        # Eine Linie pro Spalte von y (frames x Kanäle), bei 1-D genau eine
+        ax = self.axes[index]
+        self.envelopes[index] = env
+        count = 1 if y.ndim == 1 else y.shape[1]
+        lines = self.lines.get(index)
+        if lines is None or len(lines) != count:
+            for line in lines or ():
+                line.remove()
+            lines = [ax.plot([], [], animated=self.blit, **kwargs)[0] for _ in range(count)]
+            self.lines[index] = lines
+            self.full = True
+
+        if env is not None:
+            self.autoscale(ax, env.xmin, env.xmax, env.ymin, env.ymax)
+            self.refresh(index)
+        elif x.size:
+            for c, line in enumerate(lines):
+                line.set_data(x, y if y.ndim == 1 else y[:, c])
+            self.autoscale(ax, x[0], x[-1], np.nanmin(y), np.nanmax(y))
+        return lines
+
+    def image(self, index, data, extent, **kwargs):
+        # Bild (z. B. Spektrogramm) wiederverwenden, nur Daten/Ausdehnung ersetzen
+        if self.record("image", index, data, extent, **kwargs):
+            return
+        ax = self.axes[index]
+        image = self.images.get(index)
+        if image is None:
+            image = ax.imshow(data, aspect='auto', origin='lower', extent=extent,
+                              animated=self.blit, **kwargs)
+            self.images[index] = image
+            self.full = True
+        else:
+            image.set_data(data)
+            if 'clim' in kwargs:
+                image.set_clim(kwargs['clim'])
+            if tuple(image.get_extent()) != tuple(extent):
+                image.set_extent(extent)
+                self.full = True
+        return image
+
+    def envelope(self, index, width, x, y):
+        # Pyramide nur für lange, gleichmäßige Signale; bei unveränderten
+        # Daten (z. B. Eingangssignal aus dem Cache) wird sie wiederverwendet
+        env = self.envelopes.get(index)
+        if env is not None and env.y is y:
+            return env
+        if y.shape[0] > LOD_FACTOR * width and lod.uniform(x, y):
+            return lod.Envelope(x, y)
+        return None
+
+    def refresh(self, index):
+        # Passende Stufe der Pyramide für den sichtbaren Bereich abfragen
+        env = self.envelopes.get(index)
+        lines = self.lines.get(index)
+        if env is None or lines is None:
+            return
+        ax = self.axes[index]
+        lo, hi = ax.get_xlim()
+        xs, ys = env.query(lo, hi, ax.bbox.width)
+        for c, line in enumerate(lines):
+            line.set_data(xs, ys if ys.ndim == 1 else ys[:, c])
+
+    def autoscale(self, ax, x0, x1, y0, y1):
+        # Grenzen nur anpassen, wenn die Daten herausragen oder die y-Achse
+        # weniger als halb ausfüllen; sonst bleibt der gepufferte Hintergrund gültig
+        if ax.get_autoscalex_on():
+            lo, hi = ax.get_xlim()
+            if x0 != lo or x1 != hi:
+                ax.set_xlim(x0, x1, auto=None)
+                self.full = True
+        if ax.get_autoscaley_on():
+            lo, hi = ax.get_ylim()
+            span = y1 - y0
+            if y0 < lo or y1 > hi or span < 0.5 * (hi - lo):
+                margin = 0.05 * span if span > 0 else 1
+                ax.set_ylim(y0 - margin, y1 + margin, auto=None)
+                self.full = True
+
+    def draw(self):
+        if self.record("draw"):
+            publish = self.local.publish
+            if publish is not None:
+                ops = self.local.ops
+                publish(ops[self.local.sent:])
+                self.local.sent = len(ops)
+            return
+        canvas = self.fig.canvas
+        if self.relayout:
+            with timing.stage("layout"):
+                self.fig.tight_layout()
+            self.relayout = False
+            self.full = True
+        if not self.blit or self.full or self.background is None:
+            self.full = False
+            canvas.draw_idle()
+        else:
+            with timing.stage("blit"):
+                canvas.restore_region(self.background)
+                self.drawAnimated()
+                canvas.blit(self.fig.bbox)
+
+    def artists(self):
+        if self.title is not None:
+            yield self.title
+        yield from self.images.values()
+        for lines in self.lines.values():
+            yield from lines
+
+    def drawAnimated(self):
+        for artist in self.artists():
+            self.fig.draw_artist(artist)
+
+    def onDraw(self, event):
+        # Nach jedem vollständigen Zeichnen (auch Zoom/Resize) Hintergrund neu puffern
+        if not self.blit or not self.valid():
+            self.background = None
+            return
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.drawAnimated()
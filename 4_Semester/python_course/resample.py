@@ -0,0 +1,114 @@
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Polyphasen-Resampling mit rationalem Verhältnis up/down: Hochtasten um up,
+# Tiefpass (Kaiser-gefensterter Sinc), Heruntertasten um down, ohne die Nullen
+# und verworfenen Samples je zu berechnen. Filterentwürfe werden pro (up, down)
+# gecacht. Resampler arbeitet blockweise mit Zustand; aneinandergehängt ergeben
+# process() und flush() dasselbe wie resample() über das ganze Signal.
+
+HALF = 10            # halbe Filterlänge in Perioden der niedrigeren Rate
+BETA = 8.0           # Kaiser-Fenster
+MAX_DENOMINATOR = 1000
+CHUNK = 8192         # Ausgangssamples pro Rechenschritt
+
+
+def ratio(fs, target):
+    r = Fraction(int(round(target)), int(round(fs))).limit_denominator(MAX_DENOMINATOR)
+    return r.numerator, r.denominator
+
+
+@lru_cache(maxsize=32)
+def design(up, down):
+    # Tiefpass bei der kleineren der beiden Nyquist-Frequenzen, als Polyphasen-
+    # Matrix (up x K): Zeile p enthält h[p::up] in umgekehrter Reihenfolge
+    rate = max(up, down)
+    n = 2 * HALF * rate + 1
+    t = np.arange(n) - HALF * rate
+    h = np.sinc(t / rate) / rate * np.kaiser(n, BETA) * up
+    K = -(-n // up)
+    h = np.concatenate((h, np.zeros(K * up - n)))
+    phases = np.ascontiguousarray(h.reshape(K, up).T[:, ::-1])
+    phases.flags.writeable = False
+    return phases, HALF * rate
+
+
+class Resampler:
+    def __init__(self, fs, target):
+        self.up, self.down = ratio(fs, target)
+        self.fs = fs * self.up / self.down
+        if self.fs == int(self.fs):
+            self.fs = int(self.fs)
+        self.phases, self.delay = design(self.up, self.down)
+        self.K = self.phases.shape[1]
+        self.buf = None
+        self.offset = -(self.K - 1)   # Eingangsindex von buf[0] (davor Nullen)
+        self.m = 0                    # nächster Ausgangsindex
+        self.n = 0                    # bisher gelesene Eingangssamples
+
+    def run(self, limit=None):
+        # Alle Ausgangssamples rechnen, deren Eingangsfenster vollständig in buf liegt
+        up, down = self.up, self.down
+        last = self.offset + self.buf.shape[0] - 1
+        stop = (last * up + up - 1 - self.delay) // down + 1
+        if limit is not None:
+            stop = min(stop, limit)
+        if stop <= self.m:
+            return np.zeros((0,) + self.buf.shape[1:])
+        windows = sliding_window_view(self.buf, self.K, axis=0)
+        out = np.empty((stop - self.m,) + self.buf.shape[1:])
+        # In Abschnitten, damit die Fenstermatrix (Ausgänge x K) klein bleibt
+        for m0 in range(self.m, stop, CHUNK):
+            m1 = min(stop, m0 + CHUNK)
+            i, p = np.divmod(np.arange(m0, m1) * down + self.delay, up)
+            out[m0 - self.m:m1 - self.m] = np.einsum(
+                "m...k,mk->m...", windows[i - self.offset - self.K + 1], self.phases[p])
+        self.m = stop
+        # Nicht mehr benötigten Anfang von buf verwerfen
+        keep = (self.m * down + self.delay) // up - self.offset - self.K + 1
+        if keep > 0:
+            self.buf = self.buf[keep:]
+            self.offset += keep
+        return out
+
+    def process(self, block):
+        block = np.asarray(block, dtype=float)
+        if self.buf is None:
+            self.buf = np.zeros((self.K - 1,) + block.shape[1:])
+        self.buf = np.concatenate((self.buf, block))
+        self.n += block.shape[0]
+        return self.run()
+
+    def flush(self):
+        # Restliche Ausgangssamples mit Nullen hinter dem Signalende
+        if self.buf is None:
+            return np.zeros(0)
+        total = -(-self.n * self.up // self.down)
+        need = ((total - 1) * self.down + self.delay) // self.up
+        pad = max(0, need - (self.offset + self.buf.shape[0] - 1))
+        self.buf = np.concatenate((self.buf, np.zeros((pad,) + self.buf.shape[1:])))
+        return self.run(total)
+
+
+def stream(blocks, fs, target):
+    # Generator: Blöcke mit Rate fs -> Blöcke mit Rate target
+    resampler = Resampler(fs, target)
+    for block in blocks:
+        out = resampler.process(block)
+        if out.shape[0]:
+            yield out
+    out = resampler.flush()
+    if out.shape[0]:
+        yield out
+
+
+def resample(x, fs, target):
+    # Ganzes Signal umrechnen, liefert (Samples, neue Rate)
+    resampler = Resampler(fs, target)
+    if int(round(target)) == int(round(fs)):
+        return np.asarray(x), fs
+    out = np.concatenate((resampler.process(x), resampler.flush()))
+    return out, resampler.fs
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Fertige Skriptergebnisse (aufgezeichnete Zeichenbefehle + Audio) je
+# (Skript, Datei, mtime, value, value2). Wie audio_cache in Bytes begrenzt,
+# bei Überschreitung wird LRU verdrängt. Gezählt wird jeder Puffer, den das
+# Ergebnis festhält, auch Samples und Zeitachse aus audio_cache: das Ergebnis
+# hält sie am Leben, auch wenn audio_cache den Eintrag längst verdrängt hat.
+
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def compact(ops):
+    # Zwischenstände beim Abspielen aus dem Cache überspringen: nur ein draw() am Ende
+    ops = [op for op in ops if op[0] != "draw"]
+    ops.append(("draw", (), {}))
+    return ops
+
+
+def arrays(value):
+    if isinstance(value, np.ndarray):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from arrays(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from arrays(item)
+    elif hasattr(value, "levels"):  # lod.Envelope
+        yield value.y
+        yield from arrays(value.levels)
+
+
+def root(array):
+    # Ursprünglicher Puffer einer Sicht
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def size(ops, audio):
+    # Jeden Puffer nur einmal zählen (Eingangssignal steckt oft in mehreren
+    # Befehlen, Sichten teilen sich ihren Ursprungspuffer)
+    seen = {}
+    for array in arrays([[op[1] for op in ops], audio]):
+        base = root(array)
+        seen[id(base)] = base.nbytes
+    return sum(seen.values())
+
+
+class Result:
+    def __init__(self, ops, audio):
+        self.ops = compact(ops)
+        self.audio = audio
+        self.nbytes = size(self.ops, audio)
+
+
+class ResultCache:
+    def __init__(self, maxBytes=MAX_BYTES):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, ops, audio):
+        result = Result(ops, audio)
+        if result.nbytes > self.maxBytes:
+            return None
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self.entries[key] = result
+            self.bytes += result.nbytes
+            while self.bytes > self.maxBytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.entries), "bytes": self.bytes}
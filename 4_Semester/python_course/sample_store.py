@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import soundfile as sf
+
+import timing
+
+# Dauerhafter Speicher für dekodierte Sounddateien: jede Datei wird einmal (im
+# Hintergrund) nach float32 in eine .npy-Datei (frames x Kanäle) umgewandelt,
+# daneben liegt ein JSON-Kopf mit fs, Kanälen, Länge und mtime/Größe der
+# Quelle. Geöffnet wird per np.memmap ohne Kopie; audio_cache reicht diese
+# Sicht an die Skripte weiter, ein Zeitbereich (z. B. beim Zoomen ein Slice
+# in lod.Envelope.query) liest also nur die betroffenen Seiten der Datei.
+# Ändert sich die Quelle, ist der Eintrag ungültig.
+
+STORE_DIR = ".samples"
+BLOCK = 65536
+# False: Store weder lesen noch füllen, Dateien werden immer dekodiert (bench.py)
+ENABLED = True
+
+
+class SampleStore:
+    def __init__(self, directory=STORE_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.queue = deque()
+        self.queued = set()
+        self.thread = None
+        self.opened = {}
+
+    def paths(self, fileName):
+        name = hashlib.sha1(os.path.abspath(fileName).encode("utf-8")).hexdigest()[:16]
+        base = os.path.join(self.directory, name)
+        return base + ".npy", base + ".json"
+
+    def source(self, fileName):
+        st = os.stat(fileName)
+        return {"source": os.path.abspath(fileName), "mtime": st.st_mtime_ns, "size": st.st_size}
+
+    def header(self, fileName):
+        # Gültiger Kopf oder None (fehlt, kaputt oder Quelle geändert)
+        _, meta = self.paths(fileName)
+        try:
+            header = json.load(open(meta))
+        except (OSError, ValueError):
+            return None
+        if any(header.get(k) != v for k, v in self.source(fileName).items()):
+            return None
+        return header
+
+    def open(self, fileName):
+        # (memmap frames x Kanäle, fs) oder None, wenn noch nicht umgewandelt
+        header = self.header(fileName)
+        if header is None:
+            return None
+        npy, _ = self.paths(fileName)
+        key = (npy, header["mtime"])
+        with self.lock:
+            data = self.opened.get(key)
+        if data is None:
+            try:
+                # Als einfache ndarray-Sicht, damit Ergebnisse keine memmaps werden
+                data = np.asarray(np.load(npy, mmap_mode="r")[:header["frames"]])
+            except (OSError, ValueError):
+                return None
+            with self.lock:
+                self.opened[key] = data
+        return data, header["fs"]
+
+    def write(self, fileName, data=None, fs=None):
+        # Umwandeln und atomar ablegen; bereits dekodierte Daten werden direkt übernommen
+        os.makedirs(self.directory, exist_ok=True)
+        npy, meta = self.paths(fileName)
+        source = self.source(fileName)
+        tmp = npy + ".tmp.npy"
+        with timing.stage("transcode"):
+            if data is not None:
+                data = np.asarray(data, dtype=np.float32)
+                if data.ndim == 1:
+                    data = data[:, None]
+                np.save(tmp, data)
+                frames, channels = data.shape
+            else:
+                with sf.SoundFile(fileName) as f:
+                    fs, channels = f.samplerate, f.channels
+                    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32,
+                                                    shape=(max(f.frames, 1), channels))
+                    frames = 0
+                    for block in f.blocks(blocksize=BLOCK, dtype="float32", always_2d=True):
+                        n = min(block.shape[0], out.shape[0] - frames)
+                        out[frames:frames + n] = block[:n]
+                        frames += n
+                    out.flush()
+                    del out
+        with self.lock:
+            for key in [k for k in self.opened if k[0] == npy]:
+                del self.opened[key]
+        os.replace(tmp, npy)
+        with open(meta + ".tmp", "w") as out:
+            json.dump(dict(source, fs=fs, channels=channels, frames=frames, dtype="float32"), out)
+        os.replace(meta + ".tmp", meta)
+
+    def schedule(self, fileName, data=None, fs=None):
+        # Umwandlung im Hintergrund-Thread einreihen (doppelte Aufträge werden ignoriert)
+        path = os.path.abspath(fileName)
+        with self.lock:
+            if path in self.queued:
+                return
+            self.queued.add(path)
+            self.queue.append((fileName, data, fs))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, daemon=True)
+                self.thread.start()
+
+    def prefetch(self, fileNames):
+        for fileName in fileNames:
+            if self.header(fileName) is None:
+                self.schedule(fileName)
+
+    def work(self):
+        while True:
+            with self.lock:
+                if not self.queue:
+                    self.thread = None
+                    return
+                fileName, data, fs = self.queue.popleft()
+            try:
+                if self.header(fileName) is None:
+                    self.write(fileName, data, fs)
+            except Exception as err:
+                print("Sample store: " + fileName + " not transcoded: " + str(err))
+            finally:
+                with self.lock:
+                    self.queued.discard(os.path.abspath(fileName))
+
+
+STORE = SampleStore()
+
+
+def mapped(fileName):
+    return STORE.open(fileName) if ENABLED else None
+
+
+def schedule(fileName, data=None, fs=None):
+    if ENABLED:
+        STORE.schedule(fileName, data, fs)
+
+
+def prefetch(fileNames):
+    if ENABLED:
+        STORE.prefetch(fileNames)
@@ -0,0 +1,200 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+# Gemeinsame Spektralfunktionen für die Skripte. Audiosignale sind reell, daher
+# reicht rfft/irfft (halbe Rechenzeit und halber Speicher gegenüber fft).
+# Die Länge wird auf eine schnelle Länge (nur Faktoren 2, 3, 5) aufgefüllt.
+# FLOAT32 = True schaltet global auf float32/complex64 um (schlanker Modus:
+# auch das Dekodieren liefert dann float32, siehe audio_cache).
+
+FLOAT32 = False
+CHUNK = 65536   # Samples pro Abschnitt bei abschnittsweise erzeugten Signalen
+
+_work = threading.local()
+
+
+@lru_cache(maxsize=None)
+def fastLength(n):
+    # Kleinste Zahl 2^a * 3^b * 5^c >= n
+    if n <= 1:
+        return 1
+    best = 1 << (n - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p = p35
+            while p < n:
+                p *= 2
+            best = min(best, p)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def workspace(name, shape, dtype):
+    # Wiederverwendeter Zwischenpuffer (pro Thread, ein Puffer je Name)
+    bufs = _work.__dict__.setdefault("bufs", {})
+    buf = bufs.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = bufs[name] = np.empty(shape, dtype)
+    return buf
+
+
+def column(v, ndim):
+    # 1-D-Vektor (entlang Achse 0) so formen, dass er über alle Kanäle broadcastet
+    return v.reshape((-1,) + (1,) * (ndim - 1))
+
+
+def phase(start, stop, step):
+    # 2π (n step mod 1) für n = start ... stop-1, in float64
+    p = np.arange(start, stop) * step
+    p -= np.floor(p)
+    p *= 2 * np.pi
+    return p
+
+
+def dtypes(float32=None):
+    if FLOAT32 if float32 is None else float32:
+        return np.float32, np.complex64
+    return np.float64, np.complex128
+
+
+def rfft(x, n=None, float32=None, out=None):
+    # rfft entlang Achse 0 (Samples), optional in einen vorhandenen Puffer
+    real, complex_ = dtypes(float32)
+    x = np.asarray(x, dtype=real)
+    n = x.shape[0] if n is None else n
+    if out is None:
+        out = np.empty((n // 2 + 1,) + x.shape[1:], dtype=complex_)
+    try:
+        return np.fft.rfft(x, n=n, axis=0, out=out)
+    except TypeError:
+        # numpy < 2.0 kennt kein out=
+        out[...] = np.fft.rfft(x, n=n, axis=0)
+        return out
+
+
+def irfft(X, n, float32=None):
+    real, _ = dtypes(float32)
+    return np.fft.irfft(X, n=n, axis=0).astype(real, copy=False)
+
+
+def frequencies(nfft, fs):
+    # Zentrierte Frequenzachse passend zu magnitude()
+    return _frequencies(nfft, fs, dtypes()[0])
+
+
+@lru_cache(maxsize=32)
+def _frequencies(nfft, fs, real):
+    f = np.fft.fftshift(np.fft.fftfreq(nfft, 1 / fs)).astype(real, copy=False)
+    f.flags.writeable = False
+    return f
+
+
+def magnitude(x, nt=None, nfft=None, float32=None, out=None):
+    # Entspricht np.fft.fftshift(np.abs(np.fft.fft(x))) / nt, aber über rfft:
+    # die negative Hälfte ist das Spiegelbild der positiven
+    real, complex_ = dtypes(float32)
+    x = np.asarray(x)
+    nt = x.shape[0] if nt is None else nt
+    nfft = fastLength(x.shape[0]) if nfft is None else nfft
+    X = rfft(x, nfft, float32, out=workspace("magnitude", (nfft // 2 + 1,) + x.shape[1:], complex_))
+    if out is None:
+        out = np.empty((nfft,) + x.shape[1:], dtype=real)
+    mid = nfft // 2
+    np.abs(X[:nfft - mid], out=out[mid:])
+    np.abs(X[mid:0:-1], out=out[:mid])
+    out /= nt
+    return out
+
+
+def shiftBins(X, bins, out=None):
+    # Halbspektrum um bins nach oben schieben, unten mit Nullen auffüllen
+    if out is None:
+        out = np.zeros_like(X)
+    if bins > 0:
+        out[bins:] = X[:X.shape[0] - bins]
+        out[:bins] = 0
+    elif out is not X:
+        out[...] = X
+    return out
+
+
+@lru_cache(maxsize=16)
+def _chirp(n, m, step, fs):
+    # Bluestein-Faktoren für die Chirp-z-Transformation auf dem Raster k * step
+    L = fastLength(n + m - 1)
+    w = np.pi * step / fs
+    pre = np.exp(-1j * w * np.arange(n) ** 2)
+    post = np.exp(-1j * w * np.arange(m) ** 2)
+    v = np.zeros(L, dtype=complex)
+    v[:m] = np.exp(1j * w * np.arange(m) ** 2)
+    v[L - n + 1:] = np.exp(1j * w * np.arange(n - 1, 0, -1) ** 2)
+    V = np.fft.fft(v)
+    for a in (pre, post, V):
+        a.flags.writeable = False
+    return pre, post, V, L
+
+
+def zoom(x, fs, start, step, m):
+    # Spektrum (komplex) nur im interessierenden Band an m Frequenzen
+    # start + k * step, beliebig fein; entlang Achse 0, start darf pro Spalte
+    # verschieden sein. Entspricht np.fft.fft an diesen Stellen ausgewertet.
+    x = np.asarray(x)
+    n = x.shape[0]
+    pre, post, V, L = _chirp(n, m, float(step), float(fs))
+    shape = (-1,) + (1,) * (x.ndim - 1)
+    start = np.asarray(start, dtype=float)
+    y = x * pre.reshape(shape)
+    if np.any(start != 0):
+        y = y * np.exp(np.multiply.outer(-2j * np.pi * np.arange(n) / fs, start))
+    Y = np.fft.fft(y, L, axis=0)
+    Y *= V.reshape(shape)
+    Y = np.fft.ifft(Y, axis=0)[:m]
+    Y *= post.reshape(shape)
+    return Y
+
+
+def _neighbours(X, k):
+    # Werte bei k-1, k, k+1 entlang Achse 0 (k pro Spalte)
+    k = np.clip(k, 1, X.shape[0] - 2)
+    take = lambda i: np.take_along_axis(X, np.expand_dims(i, 0), axis=0)[0]
+    return k, take(k - 1), take(k), take(k + 1)
+
+
+def parabolic(mag, k):
+    # Parabel durch drei Betragswerte: Lage des Maximums in Bins
+    k, a, b, c = _neighbours(mag, np.asarray(k))
+    den = a - 2 * b + c
+    return k + np.where(den != 0, 0.5 * (a - c) / np.where(den != 0, den, 1), 0)
+
+
+def jacobsen(X, k):
+    # Jacobsen-Schätzer auf dem komplexen Spektrum: Lage des Maximums in Bins
+    k, a, b, c = _neighbours(X, np.asarray(k))
+    den = 2 * b - a - c
+    return k + np.real(np.where(den != 0, (a - c) / np.where(den != 0, den, 1), 0))
+
+
+@lru_cache(maxsize=16)
+def _roots(n):
+    r = np.exp(-2j * np.pi * np.arange(n) / n)
+    r.flags.writeable = False
+    return r
+
+
+def peak(x, fs, m=32):
+    # Frequenz des stärksten Spektralanteils (ohne Nyquist) pro Spalte:
+    # grob per rfft-Argmax, dann Chirp-z im Band ±1 Bin und Parabel. Der Bandanfang
+    # liegt auf einem Bin, die Verschiebung dorthin ist daher nur ein Tabellenzugriff.
+    x = np.asarray(x)
+    n = x.shape[0]
+    k = np.argmax(np.abs(np.fft.rfft(x, axis=0)[:n // 2]), axis=0)
+    first = np.maximum(k - 1, 0)
+    y = x * _roots(n)[np.multiply.outer(np.arange(n), first) % n]
+    step = 2 * fs / n / (m - 1)
+    Z = np.abs(zoom(y, fs, 0, step, m))
+    return first * fs / n + parabolic(Z, np.argmax(Z, axis=0)) * step
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import timing
+
+# Streaming-STFT: Blöcke beliebiger Länge werden angehängt, fertige Frames
+# (Fensterlänge nperseg, Vorschub hop) landen als dB-Betragsspektren in einem
+# vorab angelegten Ringpuffer. Ist die Länge des Signals bekannt, wird der
+# Ring passend angelegt und deckt immer das ganze Signal ab: gibt es mehr
+# Frames als Plätze, wird nur jeder stride-te gerechnet (Vorschub hop * stride),
+# statt den Anfang zu überschreiben. Fenster und ganze Engines werden gecacht,
+# so dass ein erneuter Aufruf mit gleichen Parametern dort weitermacht, wo der
+# letzte aufgehört hat.
+
+FRAMES = 2048        # höchstens so viele Frames (Spalten des Spektrogramms)
+MAX_ENGINES = 8
+
+_engines = OrderedDict()
+
+
+@lru_cache(maxsize=32)
+def window(name, n):
+    w = {"hann": np.hanning, "hamming": np.hamming, "blackman": np.blackman}[name](n)
+    w.flags.writeable = False
+    return w
+
+
+class Stft:
+    def __init__(self, nperseg, hop, fs, samples=None, frames=FRAMES, windowName="hann"):
+        self.nperseg = nperseg
+        self.hop = hop
+        self.fs = fs
+        self.stride = 1
+        if samples is not None:
+            total = max(1, (samples - nperseg) // hop + 1)
+            self.stride = -(-total // frames)
+            frames = -(-total // self.stride)
+        self.step = hop * self.stride   # Vorschub der gespeicherten Frames
+        self.window = window(windowName, nperseg)
+        self.ring = np.zeros((frames, nperseg // 2 + 1), dtype=np.float32)
+        self.pending = np.zeros(0)
+        self.skip = 0        # Samples bis zum nächsten Frame, die noch nicht angehängt sind (step > nperseg)
+        self.count = 0       # bisher berechnete Frames
+        self.samples = 0     # bisher angehängte Samples
+        self.done = False
+
+    def push(self, block):
+        self.samples += len(block)
+        skipped = min(self.skip, len(block))
+        self.skip -= skipped
+        data = np.concatenate((self.pending, block[skipped:]))
+        if data.size < self.nperseg:
+            self.pending = data
+            return 0
+        k = (data.size - self.nperseg) // self.step + 1
+        self.pending = data[k * self.step:].copy()
+        self.skip = max(0, k * self.step - data.size)
+
+        # Nur die Frames rechnen, die noch in den Ring passen (bei unbekannter Länge)
+        capacity = self.ring.shape[0]
+        first = max(0, k - capacity)
+        with timing.stage("stft"):
+            frames = sliding_window_view(data, self.nperseg)[::self.step][first:k]
+            spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1))
+            rows = (self.count + first + np.arange(k - first)) % capacity
+            self.ring[rows] = 20 * np.log10(spectrum + 1e-12)
+        self.count += k
+        return k
+
+    def feed(self, data, blocksize):
+        # Restliche Samples eines Arrays blockweise anhängen (fortsetzbar)
+        while self.samples < data.shape[0]:
+            yield self.push(data[self.samples:self.samples + blocksize])
+        self.done = True
+
+    def image(self):
+        # Kopie (Frequenz x Zeit), älteste Frames links
+        capacity = self.ring.shape[0]
+        if self.count <= capacity:
+            return self.ring[:self.count].T.copy()
+        return np.roll(self.ring, -(self.count % capacity), axis=0).T.copy()
+
+    def extent(self):
+        # Zeitachse der Frame-Mitten im Ring, Frequenz 0..fs/2
+        first = max(0, self.count - self.ring.shape[0])
+        t0 = (first * self.step + self.nperseg / 2) / self.fs
+        t1 = ((self.count - 1) * self.step + self.nperseg / 2) / self.fs
+        return (t0, max(t1, t0 + self.step / self.fs), 0, self.fs / 2)
+
+
+def engine(key, nperseg, hop, fs, samples=None, windowName="hann"):
+    # Engine pro (Datei, Fenster, Vorschub) wiederverwenden
+    key = (key, nperseg, hop, samples, windowName)
+    stft = _engines.get(key)
+    if stft is None:
+        stft = _engines[key] = Stft(nperseg, hop, fs, samples, windowName=windowName)
+        if len(_engines) > MAX_ENGINES:
+            _engines.popitem(last=False)
+    else:
+        _engines.move_to_end(key)
+    return stft
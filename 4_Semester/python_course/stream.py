@@ -0,0 +1,134 @@
+import argparse
+import time
+
+import numpy as np
+import soundfile as sf
+
+import audio_cache
+import fir
+import hilbert
+import playback
+import resample
+import sample_store
+
+# Blockweise Verarbeitung sehr langer Aufnahmen mit Generatoren: Dekodieren,
+# Mischer (algo1), Filter (algo2) und Wiedergabe arbeiten auf Blöcken fester
+# Größe. Oszillatorphase und Filterzustand laufen über die Blockgrenzen weiter,
+# der Speicherbedarf hängt nicht von der Dateilänge ab.
+
+BLOCK = 8192
+
+
+def blocks(fileName, blocksize=BLOCK, channel=0):
+    # Aus dem Sample-Store nur die Ausschnitte lesen, sonst blockweise dekodieren
+    stored = sample_store.mapped(fileName)
+    if stored is not None:
+        data = stored[0]
+        for start in range(0, data.shape[0], blocksize):
+            yield audio_cache.select(data[start:start + blocksize], channel)
+        return
+    for block in sf.blocks(fileName, blocksize=blocksize, always_2d=True):
+        yield audio_cache.select(block, channel)
+
+
+def mix(blocks, f_mix, fs):
+    # Multiplikation mit cos(2π f_mix t), Phase wird fortgeschrieben
+    w = 2 * np.pi * f_mix / fs
+    phase = 0.0
+    for block in blocks:
+        n = block.shape[0]
+        osc = np.cos(phase + w * np.arange(n))
+        yield block * (osc if block.ndim == 1 else osc[:, None])
+        phase = (phase + w * n) % (2 * np.pi)
+
+
+def firFilter(blocks, h, key=None):
+    # Ausgabe entspricht np.convolve(signal, h, mode='same') des ganzen Signals
+    state = fir.FirStream(h, key)
+    for block in blocks:
+        out = state.process(block)
+        if out.shape[0]:
+            yield out
+    yield state.flush()
+
+
+def shift(blocks, freq, fs):
+    # Einseitenband-Verschiebung um freq Hz (Hilbert-FIR und Oszillator mit Zustand)
+    shifter = hilbert.Shifter(fs, freq)
+    for block in blocks:
+        out = shifter.process(block)
+        if out.shape[0]:
+            yield out
+    yield shifter.flush()
+
+
+def normalize(blocks, peak=None):
+    # Ohne das ganze Signal ist der Maximalwert unbekannt: mit festem peak
+    # skalieren oder mit dem bisher größten Betrag (nie übersteuert)
+    running = peak or 0.0
+    for block in blocks:
+        if peak is None and block.size:
+            running = max(running, float(np.max(np.abs(block))))
+        yield block / running if running > 0 else block
+
+
+def pipeline(fileName, f_mix=None, P=None, M=40, N=81, peak=None, blocksize=BLOCK, channel=0, rate=None,
+             f_shift=None):
+    # Kette wie algo1 (nur f_mix) bzw. algo2 (f_mix und P), danach optional
+    # Verschiebung um f_shift Hz wie algo7; vorher optional auf die
+    # Analyse-Rate rate heruntergerechnet
+    fs = sf.info(fileName).samplerate
+    chain = blocks(fileName, blocksize, channel)
+    if rate is not None and rate < fs:
+        resampler = resample.Resampler(fs, rate)
+        chain, fs = resample.stream(chain, fs, rate), resampler.fs
+    if f_mix is not None:
+        chain = mix(chain, f_mix, fs)
+    if P is not None:
+        chain = firFilter(chain, fir.gaussSine(P, M, N), key=("gaussSine", P, M, N))
+        chain = normalize(chain, peak)
+    if f_shift is not None:
+        chain = shift(chain, f_shift, fs)
+    return chain, fs
+
+
+def play(chain, fs, player):
+    # Der Wiedergabedienst holt die Blöcke nach und nach, während später
+    # folgende noch dekodiert werden
+    player.stream(chain, fs)
+
+
+def write(chain, fs, fileName):
+    # Kanalzahl aus dem ersten Block (1-D mono, sonst frames x Kanäle)
+    chain = iter(chain)
+    first = next(chain, np.zeros(0))
+    with sf.SoundFile(fileName, 'w', samplerate=fs, channels=1 if first.ndim == 1 else first.shape[1]) as out:
+        out.write(first)
+        for block in chain:
+            out.write(block)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Lange Audiodateien blockweise mischen, filtern und abspielen")
+    parser.add_argument("fileName")
+    parser.add_argument("--mix", type=float, default=None, help="Mischfrequenz in Hz")
+    parser.add_argument("--P", type=int, default=None, help="Filterparameter P wie in algo2")
+    parser.add_argument("--shift", type=float, default=None, help="Frequenzverschiebung in Hz wie algo7")
+    parser.add_argument("--block", type=int, default=BLOCK)
+    parser.add_argument("--rate", type=int, default=None, help="Analyse-Rate in Hz")
+    parser.add_argument("--channel", default="0", help="Kanalnummer, mid, side oder all")
+    parser.add_argument("--out", default=None, help="in Datei schreiben statt abspielen")
+    parser.add_argument("--backend", default="pyaudio", choices=sorted(playback.BACKENDS))
+    args = parser.parse_args()
+
+    channel = int(args.channel) if args.channel.isdigit() else args.channel
+    chain, fs = pipeline(args.fileName, args.mix, args.P, blocksize=args.block, channel=channel, rate=args.rate,
+                         f_shift=args.shift)
+    if args.out:
+        write(chain, fs, args.out)
+    else:
+        player = playback.PlaybackService(args.backend)
+        play(chain, fs, player)
+        while player.busy():
+            time.sleep(0.1)
+        player.close()
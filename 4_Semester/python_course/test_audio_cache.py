@@ -0,0 +1,25 @@
+import numpy as np
+import soundfile as sf
+
+import audio_cache
+import sample_store
+
+
+def test_products_of_evicted_entry_not_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(sample_store, "ENABLED", False)
+    files = []
+    for i in range(2):
+        fileName = str(tmp_path / "s{0}.wav".format(i))
+        sf.write(fileName, np.zeros(100), 8000, subtype="FLOAT")
+        files.append(fileName)
+
+    # Platz für genau einen Eintrag (100 Samples float64 = 800 Bytes)
+    cache = audio_cache.AudioCache(maxBytes=1000)
+    first = cache.load(files[0], channel=0)
+    second = cache.load(files[1], channel=0)
+    assert first.key not in cache.entries
+    assert cache.bytes == second.nbytes == 800
+
+    first.get("extra", lambda: np.zeros(50))
+    assert cache.bytes == 800
+    assert second.key in cache.entries
@@ -0,0 +1,38 @@
+import numpy as np
+import soundfile as sf
+
+import fir
+import graph
+import sample_store
+
+
+class Collect(graph.Sink):
+    def write(self, signal):
+        self.signal = signal
+
+
+def test_normalize_reuses_filter_buffer(tmp_path, monkeypatch):
+    monkeypatch.setattr(sample_store, "ENABLED", False)
+    fileName = str(tmp_path / "s.wav")
+    sf.write(fileName, np.sin(np.arange(4000) / 10.0), 8000, subtype="FLOAT")
+
+    buffers = []
+    convolve = fir.convolve
+
+    def recording(*args, **kwargs):
+        out = convolve(*args, **kwargs)
+        buffers.append(out)
+        return out
+    monkeypatch.setattr(fir, "convolve", recording)
+
+    # Wie algo2: das Filterergebnis liest nur die Normierung, sie rechnet in dessen Puffer
+    source = graph.Load(fileName, channel=0, rate=None)
+    filtered = graph.Normalize(graph.Fir(graph.Mix(source, 1000.0), np.ones(5) / 5, key=("box", 5)))
+    sinks = [Collect(filtered), Collect(graph.Spectrum(filtered))]
+    plan = graph.Plan(sinks)
+    assert filtered.inputs[0].key() not in plan.keep
+
+    signal = graph.Graph().execute(sinks)[0]
+    assert len(buffers) == 1
+    assert signal.data is buffers[0]
+    assert np.isclose(np.abs(signal.data).max(), 1)
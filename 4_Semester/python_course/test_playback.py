@@ -0,0 +1,38 @@
+import numpy as np
+
+import playback
+
+
+def play(fader, blocks):
+    return np.concatenate([fader.apply(np.ones(n, np.float32)) for n in blocks])
+
+
+def test_crossfade_spans_short_blocks():
+    # Altes und neues Signal konstant 1: die Summe bleibt 1, auch über mehrere kurze Blöcke
+    fader = playback.Crossfade()
+    fader.begin(np.ones(playback.FADE, np.float32))
+    assert fader.tail[-1] == 0
+    out = play(fader, [100] * 8)
+    assert np.allclose(out, 1)
+    assert fader.tail is None and fader.gains is None
+
+
+def test_short_fade_reaches_zero():
+    fader = playback.Crossfade()
+    fader.begin(np.ones(10, np.float32))
+    assert fader.tail.size == 10 and fader.tail[-1] == 0
+    assert np.allclose(play(fader, [4, 4, 4]), 1)
+
+
+def test_new_fade_during_fade():
+    # Wechsel mitten in einer Überblendung: der laufende Rest wird mit
+    # ausgeblendet, der Übergang bleibt stetig
+    fader = playback.Crossfade()
+    fader.begin(np.ones(playback.FADE, np.float32))
+    play(fader, [100])
+    fader.begin(np.ones(playback.FADE, np.float32))
+    assert fader.tail[-1] == 0
+    out = play(fader, [200, 400])
+    assert abs(out[0] - 1) < 0.01
+    assert np.max(np.abs(np.diff(out))) < 0.02
+    assert fader.tail is None and fader.gains is None
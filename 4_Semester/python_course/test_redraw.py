@@ -0,0 +1,26 @@
+import gc
+import weakref
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+import redraw
+
+
+def test_figure_collected_after_get():
+    refs = []
+    for _ in range(3):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        plotter = redraw.get(fig)
+        assert redraw.get(fig) is plotter
+        plotter.layout("test", 1, 1, ["Signal"])
+        plotter.plot(0, np.arange(10000.0), np.zeros(10000))
+        plotter.draw()
+        refs.append(weakref.ref(fig))
+    del fig, plotter
+    gc.collect()
+    assert all(ref() is None for ref in refs)
@@ -0,0 +1,24 @@
+import numpy as np
+import soundfile as sf
+
+import audio_cache
+import result_cache
+import sample_store
+
+
+def test_every_referenced_buffer_counted_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(sample_store, "ENABLED", False)
+    fileName = str(tmp_path / "s.wav")
+    sf.write(fileName, np.zeros((1000, 2)), 8000, subtype="FLOAT")
+    entry = audio_cache.AudioCache().load(fileName, channel=0)
+    data = result_cache.root(entry.data)
+
+    # Sichten auf die Samples und die Zeitachse zählen einmal mit ihrem
+    # Ursprungspuffer: das Ergebnis hält sie auch nach dem Verdrängen fest
+    own = np.ones(300)
+    ops = [("drawLine", (0, entry.t, entry.data[::2], None, {}), {}),
+           ("drawLine", (1, entry.t[:300], own, None, {}), {})]
+    cache = result_cache.ResultCache()
+    result = cache.put("key", ops, (entry.data, 8000))
+    assert result.nbytes == data.nbytes + entry.t.nbytes + own.nbytes
+    assert cache.bytes == result.nbytes
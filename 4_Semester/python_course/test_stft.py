@@ -0,0 +1,25 @@
+import numpy as np
+
+import stft
+
+
+def test_ring_covers_whole_signal():
+    fs = 8000
+    data = np.random.default_rng(0).standard_normal(60 * fs)
+    engine = stft.Stft(256, 64, fs, samples=data.shape[0], frames=500)
+    for _ in engine.feed(data, 10000):
+        pass
+    assert engine.stride > 1
+    assert engine.count <= 500
+    t0, t1, _, _ = engine.extent()
+    assert t0 < 0.1 and t1 > 59.8
+    assert engine.image().shape == (129, engine.count)
+
+
+def test_short_signal_keeps_every_frame():
+    data = np.zeros(8000)
+    engine = stft.Stft(256, 64, 8000, samples=data.shape[0])
+    for _ in engine.feed(data, 1000):
+        pass
+    assert engine.stride == 1
+    assert engine.count == (8000 - 256) // 64 + 1 == engine.ring.shape[0]
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+# Zeitmessung pro Verarbeitungsschritt (Dekodieren, DSP, FFT, Layout, Zeichnen,
+# Audio ...). Skripte und GUI umschließen Schritte mit timing.stage("name").
+# Gesammelt wird dreifach: der aktuelle Durchlauf (seit begin(), für die
+# Statusleiste), gleitende Perzentile pro Schritt und eine Ereignisliste, die
+# sich als Chrome-Trace (chrome://tracing, Perfetto) speichern lässt.
+
+WINDOW = 256        # Messwerte pro Schritt für die Perzentile
+MAX_EVENTS = 100000
+
+
+class Timer:
+    def __init__(self, window=WINDOW, maxEvents=MAX_EVENTS):
+        self.lock = threading.Lock()
+        self.enabled = True
+        self.durations = defaultdict(lambda: deque(maxlen=window))
+        self.events = deque(maxlen=maxEvents)
+        self.threads = {}
+        self.frame = {}
+        self.frameStart = time.perf_counter_ns()
+        self.frameEnd = self.frameStart
+
+    def begin(self):
+        # Neuer Durchlauf (z. B. ein Slider-Update)
+        with self.lock:
+            self.frame = {}
+            self.frameStart = self.frameEnd = time.perf_counter_ns()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter_ns())
+
+    def add(self, name, start, end):
+        thread = threading.current_thread()
+        with self.lock:
+            self.durations[name].append((end - start) / 1e6)
+            self.events.append((name, thread.ident, start, end - start))
+            self.threads[thread.ident] = thread.name
+            if start >= self.frameStart:
+                self.frame[name] = self.frame.get(name, 0.0) + (end - start) / 1e6
+                self.frameEnd = max(self.frameEnd, end)
+
+    def percentiles(self, name, q=(50, 90, 99)):
+        with self.lock:
+            values = list(self.durations.get(name, ()))
+        if not values:
+            return None
+        return dict(zip(q, np.percentile(values, q)))
+
+    def current(self):
+        # Schritte des aktuellen Durchlaufs: Name -> Summe in ms
+        with self.lock:
+            return dict(self.frame)
+
+    def summary(self):
+        # Zeile für die Statusleiste: Schritte des aktuellen Durchlaufs in ms
+        with self.lock:
+            frame = dict(self.frame)
+            total = (self.frameEnd - self.frameStart) / 1e6
+        if not frame:
+            return ""
+        parts = ["{0} {1:.1f}".format(name, ms) for name, ms in frame.items()]
+        return "  ".join(parts) + "  | gesamt {0:.1f} ms".format(total)
+
+    def report(self):
+        # Gleitende Perzentile aller Schritte, eine Zeile pro Schritt
+        with self.lock:
+            names = list(self.durations)
+        lines = []
+        for name in names:
+            p = self.percentiles(name)
+            if p:
+                lines.append("{0}: p50 {1:.1f}  p90 {2:.1f}  p99 {3:.1f} ms".format(name, p[50], p[90], p[99]))
+        return "\n".join(lines)
+
+    def export(self, fileName):
+        # Chrome-Trace-Format: vollständige Ereignisse ("X"), Zeiten in µs
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        pid = os.getpid()
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in threads.items()]
+        trace += [{"name": name, "cat": "stage", "ph": "X", "pid": pid, "tid": tid,
+                   "ts": start / 1e3, "dur": dur / 1e3} for name, tid, start, dur in events]
+        with open(fileName, "w") as out:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, out)
+        return len(events)
+
+
+TIMER = Timer()
+
+
+def stage(name):
+    return TIMER.stage(name)
+
+
+def begin():
+    TIMER.begin()
+
+
+def current():
+    return TIMER.current()
+
+
+def summary():
+    return TIMER.summary()
+
+
+def report():
+    return TIMER.report()
+
+
+def export(fileName):
+    return TIMER.export(fileName)